@@ -0,0 +1,472 @@
+"""
+Parameter sweep для тригерів по записаних depth даних (record / create_recorder JSONL).
+
+1) фрейми -> OrderBook (через adapter біржі) -> calc_imbalance_ratio для кожного volume_mode
+   (парсинг паралельно по батчах рядків; метрика рахується один раз на точку)
+2) ряди ts / mid / value[mode] кладуться в один shared memory блок
+3) кожна комбінація (trigger x value x cooldown x emit x volume_mode) - окрема задача в process pool;
+   воркери читають ряди з shared memory без копіювання і проганяють семантику TriggerEngine
+4) результат: fires, forward return по горизонтах (в напрямку тригера), runtime на комбінацію
+
+    python -m app.backtest.sweep --frames data/recorded/frames.jsonl --grid grid.yaml --out sweep.csv
+
+grid.yaml:
+    volume_mode: ["qty", "notional"]
+    horizons_sec: [10, 60, 300]
+    triggers:
+      - name: "imbalance_buy_strong"
+        op: ">="
+        value: [0.15, 0.2, 0.25, 0.3]
+        cooldown_sec: [0, 10, 30]
+        emit: ["edge"]
+
+Без --grid сітка будується з triggers у config (value x0.6..x1.4, cooldown 0/x1/x3).
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import itertools
+import json
+import os
+import sys
+import time
+from array import array
+from bisect import bisect_left
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from multiprocessing import shared_memory, util
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from loguru import logger
+
+from app.core.clock import NS_PER_SEC
+from app.core.config import AppCfg, load_config
+from app.core.gateway import pair_from_stream
+from app.core.metrics import calc_imbalance_ratio
+from app.core.models import MetricPoint
+from app.core.replay import RECV_TS_KEY, iter_frames
+from app.core.triggers import TriggerConfig, TriggerEngine, can_emit_edge, compare, compile_trigger
+from app.exchanges.base import DEFAULT_VENUE
+from app.exchanges.registry import build_adapter
+
+VOLUME_MODES = ("qty", "notional")
+
+
+@dataclass(frozen=True)
+class Combo:
+    trigger: TriggerConfig
+    volume_mode: str
+
+
+@dataclass(frozen=True)
+class Segment:
+    pair: str
+    start: int
+    end: int
+
+
+# ---------------- 1) frames -> series ----------------
+
+_parse_cfg: Optional[AppCfg] = None
+_parse_adapters: Dict[str, Any] = {}
+
+
+def _init_parser(cfg: AppCfg) -> None:
+    global _parse_cfg
+    _parse_cfg = cfg
+    _parse_adapters.clear()
+
+
+def _adapter(venue: str) -> Any:
+    a = _parse_adapters.get(venue)
+    if a is None:
+        a = _parse_adapters[venue] = build_adapter(venue, _parse_cfg)
+    return a
+
+
+def _parse_batch(lines: List[str]) -> Dict[str, Tuple[array, array, array, array]]:
+    # -> pair -> (ts_sec, mid, value_qty, value_notional)
+    out: Dict[str, Tuple[array, array, array, array]] = {}
+
+    for line in lines:
+        try:
+            msg = json.loads(line)
+        except ValueError:
+            continue
+        if not isinstance(msg, dict):
+            continue
+
+        ts_ms = msg.get(RECV_TS_KEY)
+        if not isinstance(ts_ms, (int, float)):
+            continue
+
+        data = msg.get("data") if isinstance(msg.get("data"), dict) else msg
+        stream = msg.get("stream")
+        if isinstance(stream, str):
+            if "@depth" not in stream:
+                continue
+            data["_pair"] = pair_from_stream(stream)
+
+        venue = msg.get("_venue") or DEFAULT_VENUE
+        try:
+            ob = _adapter(venue).parse_depth(data)
+        except ValueError:
+            continue
+        if ob is None or not ob.bids or not ob.asks:
+            continue
+
+        key = ob.pair if venue == DEFAULT_VENUE else f"{venue}:{ob.pair}"
+        cols = out.get(key)
+        if cols is None:
+            cols = out[key] = (array("d"), array("d"), array("d"), array("d"))
+
+        cols[0].append(ts_ms / 1000.0)
+        cols[1].append((ob.bids[0].price + ob.asks[0].price) / 2.0)
+        cols[2].append(calc_imbalance_ratio(ob, volume_mode="qty").value)
+        cols[3].append(calc_imbalance_ratio(ob, volume_mode="notional").value)
+
+    return out
+
+
+def _batches(lines: Iterable[str], size: int) -> Iterator[List[str]]:
+    it = iter(lines)
+    while True:
+        chunk = list(itertools.islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def build_series(
+    frames_path: str,
+    cfg: AppCfg,
+    *,
+    workers: int,
+    batch_lines: int = 20000,
+) -> Dict[str, Tuple[array, array, array, array]]:
+    series: Dict[str, Tuple[array, array, array, array]] = {}
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_parser, initargs=(cfg,)) as ex:
+        # map зберігає порядок батчів -> ряди по парі лишаються в порядку запису
+        for part in ex.map(_parse_batch, _batches(iter_frames(frames_path), batch_lines)):
+            for pair, cols in part.items():
+                dst = series.get(pair)
+                if dst is None:
+                    series[pair] = cols
+                else:
+                    for d, c in zip(dst, cols):
+                        d.extend(c)
+
+    return series
+
+
+# ---------------- 2) shared memory ----------------
+
+# layout: ts[N] | mid[N] | value_qty[N] | value_notional[N]  (float64)
+_COLS = ("ts", "mid", "qty", "notional")
+
+
+def publish_series(
+    series: Dict[str, Tuple[array, array, array, array]],
+) -> Tuple[shared_memory.SharedMemory, int, List[Segment]]:
+    segments: List[Segment] = []
+    n = 0
+    for pair in sorted(series):
+        cnt = len(series[pair][0])
+        segments.append(Segment(pair=pair, start=n, end=n + cnt))
+        n += cnt
+
+    shm = shared_memory.SharedMemory(create=True, size=max(8, n * 8 * len(_COLS)))
+    view = shm.buf.cast("d")
+    for seg in segments:
+        cols = series[seg.pair]
+        for ci in range(len(_COLS)):
+            view[ci * n + seg.start : ci * n + seg.end] = cols[ci]
+    view.release()
+
+    return shm, n, segments
+
+
+_shm: Optional[shared_memory.SharedMemory] = None
+_cols: Dict[str, Any] = {}
+_segments: List[Segment] = []
+
+
+def _init_worker(shm_name: str, n: int, segments: List[Segment]) -> None:
+    global _shm, _segments
+    # сегментом володіє батьківський процес (він і робить unlink); resource_tracker спільний,
+    # тож повторна реєстрація того ж імені з воркера нічого не змінює
+    try:
+        _shm = shared_memory.SharedMemory(name=shm_name, track=False)
+    except TypeError:
+        _shm = shared_memory.SharedMemory(name=shm_name)
+
+    view = _shm.buf.cast("d")
+    for ci, c in enumerate(_COLS):
+        _cols[c] = view[ci * n : (ci + 1) * n]
+    _segments = segments
+
+    # memoryview треба відпустити до закриття mmap, інакше BufferError при виході воркера
+    util.Finalize(None, _release_worker, exitpriority=10)
+
+
+def _release_worker() -> None:
+    global _shm
+    for v in _cols.values():
+        v.release()
+    _cols.clear()
+    if _shm is not None:
+        _shm.close()
+        _shm = None
+
+
+# ---------------- 3) evaluation ----------------
+
+
+def fire_indices(
+    ts: Sequence[float],
+    values: Sequence[float],
+    start: int,
+    end: int,
+    t: TriggerConfig,
+) -> List[int]:
+    """
+    Та сама логіка, що TriggerEngine.process для однієї пари (cond -> cooldown -> edge/always),
+    але по float-рядах без MetricPoint/TriggerEvent.
+    """
+    out: List[int] = []
+    op, thr, cd, always = t.op, t.value, t.cooldown_sec, t.emit == "always"
+    last_emit: Optional[float] = None
+    last_cond: Optional[bool] = None
+
+    for i in range(start, end):
+        cond = compare(op, values[i], thr)
+        if cond:
+            now = ts[i]
+            if cd > 0 and last_emit is not None and now - last_emit < cd:
+                last_cond = cond
+                continue
+            if always or can_emit_edge(last_cond, cond):
+                last_emit = now
+                out.append(i)
+        last_cond = cond
+
+    return out
+
+
+def engine_fire_indices(
+    pair: str,
+    ts: Sequence[float],
+    values: Sequence[float],
+    start: int,
+    end: int,
+    t: TriggerConfig,
+) -> List[int]:
+    # еталон через справжній TriggerEngine (повільно) - для --verify
+    engine = TriggerEngine([t])
+    out: List[int] = []
+    for i in range(start, end):
+        mp = MetricPoint(
+            pair=pair,
+            name=t.metric,
+            value=values[i],
+            bid_volume=0.0,
+            ask_volume=0.0,
+            ts_ns=int(ts[i] * NS_PER_SEC),
+        )
+        if engine.process(mp):
+            out.append(i)
+    return out
+
+
+def _direction(t: TriggerConfig) -> float:
+    # >= / > - ставка на ріст (buy pressure), <= / < - на падіння
+    return -1.0 if t.op in ("<=", "<") else 1.0
+
+
+def evaluate(combo: Combo, horizons: Sequence[float]) -> Dict[str, Any]:
+    t0 = time.perf_counter()
+    ts = _cols["ts"]
+    mid = _cols["mid"]
+    values = _cols[combo.volume_mode]
+    sign = _direction(combo.trigger)
+
+    fires = 0
+    rets: Dict[float, List[float]] = {h: [] for h in horizons}
+
+    for seg in _segments:
+        idx = fire_indices(ts, values, seg.start, seg.end, combo.trigger)
+        fires += len(idx)
+        for i in idx:
+            for h in horizons:
+                j = bisect_left(ts, ts[i] + h, i, seg.end)
+                if j < seg.end and mid[i] > 0:
+                    rets[h].append(sign * (mid[j] / mid[i] - 1.0))
+
+    row: Dict[str, Any] = {
+        "trigger": combo.trigger.name,
+        "volume_mode": combo.volume_mode,
+        "op": combo.trigger.op,
+        "value": combo.trigger.value,
+        "cooldown_sec": combo.trigger.cooldown_sec,
+        "emit": combo.trigger.emit,
+        "fires": fires,
+    }
+    for h in horizons:
+        r = rets[h]
+        n = len(r)
+        row[f"n_{h:g}s"] = n
+        row[f"mean_bps_{h:g}s"] = (sum(r) / n * 1e4) if n else 0.0
+        row[f"hit_rate_{h:g}s"] = (sum(1 for x in r if x > 0) / n) if n else 0.0
+    row["runtime_ms"] = (time.perf_counter() - t0) * 1000
+    return row
+
+
+def _evaluate_task(args: Tuple[Combo, Sequence[float]]) -> Dict[str, Any]:
+    return evaluate(*args)
+
+
+# ---------------- grid ----------------
+
+
+def _as_list(v: Any) -> List[Any]:
+    return list(v) if isinstance(v, (list, tuple)) else [v]
+
+
+def grid_from_spec(spec: Dict[str, Any]) -> Tuple[List[Combo], List[float]]:
+    modes = [str(m) for m in _as_list(spec.get("volume_mode", ["qty"]))]
+    for m in modes:
+        if m not in VOLUME_MODES:
+            raise ValueError(f"Unsupported volume_mode in grid: {m}")
+    horizons = [float(h) for h in _as_list(spec.get("horizons_sec", [10, 60]))]
+
+    combos: List[Combo] = []
+    for t in spec.get("triggers") or []:
+        for value, cd, emit, mode in itertools.product(
+            _as_list(t.get("value", 0.0)),
+            _as_list(t.get("cooldown_sec", 0.0)),
+            _as_list(t.get("emit", "edge")),
+            modes,
+        ):
+            cfg = compile_trigger({**t, "value": value, "cooldown_sec": cd, "emit": emit})
+            if cfg.metric != "imbalance_ratio":
+                raise ValueError(f"Sweep supports imbalance_ratio triggers only (got {cfg.metric})")
+            combos.append(Combo(trigger=cfg, volume_mode=mode))
+    return combos, horizons
+
+
+def grid_from_config(cfg: AppCfg) -> Dict[str, Any]:
+    triggers = []
+    for t in cfg.triggers:
+        if t.metric != "imbalance_ratio":
+            continue
+        cd = t.cooldown_sec
+        triggers.append(
+            {
+                "name": t.name,
+                "metric": t.metric,
+                "op": t.op,
+                "value": [round(t.value * k, 6) for k in (0.6, 0.8, 1.0, 1.2, 1.4)],
+                "cooldown_sec": sorted({0.0, cd, cd * 3}),
+                "emit": [t.emit],
+            }
+        )
+    return {"volume_mode": list(VOLUME_MODES), "horizons_sec": [10, 60, 300], "triggers": triggers}
+
+
+# ---------------- main ----------------
+
+
+def run_sweep(
+    frames_path: str,
+    cfg: AppCfg,
+    spec: Dict[str, Any],
+    *,
+    workers: int,
+    verify: bool = False,
+) -> List[Dict[str, Any]]:
+    combos, horizons = grid_from_spec(spec)
+    if not combos:
+        raise ValueError("Empty grid")
+
+    t0 = time.perf_counter()
+    series = build_series(frames_path, cfg, workers=workers)
+    t_parse = time.perf_counter() - t0
+
+    shm, n, segments = publish_series(series)
+    del series
+    logger.info(
+        "Sweep series | points={} | pairs={} | parse={:.1f}s | combos={} | workers={}",
+        n,
+        len(segments),
+        t_parse,
+        len(combos),
+        workers,
+    )
+
+    try:
+        if verify:
+            _init_worker(shm.name, n, segments)
+            seg = max(segments, key=lambda s: s.end - s.start)
+            for c in combos[: min(5, len(combos))]:
+                vals = _cols[c.volume_mode]
+                fast = fire_indices(_cols["ts"], vals, seg.start, seg.end, c.trigger)
+                ref = engine_fire_indices(seg.pair, _cols["ts"], vals, seg.start, seg.end, c.trigger)
+                if fast != ref:
+                    raise AssertionError(f"fire_indices != TriggerEngine for {c}")
+            _release_worker()
+            logger.info("Sweep verify | fire_indices matches TriggerEngine")
+
+        t1 = time.perf_counter()
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(shm.name, n, segments),
+        ) as ex:
+            rows = list(ex.map(_evaluate_task, [(c, horizons) for c in combos]))
+        logger.info("Sweep done | {:.1f}s", time.perf_counter() - t1)
+    finally:
+        _release_worker()
+        shm.close()
+        shm.unlink()
+
+    return rows
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    ap = argparse.ArgumentParser(description="Trigger parameter sweep over recorded depth frames")
+    ap.add_argument("--frames", required=True, help="JSONL з record / create_recorder")
+    ap.add_argument("--config", default="config/config.yaml")
+    ap.add_argument("--grid", default="", help="YAML сітка параметрів (див. docstring)")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    ap.add_argument("--out", default="", help="CSV (за замовчуванням stdout)")
+    ap.add_argument("--verify", action="store_true", help="звірити швидку симуляцію з TriggerEngine")
+    args = ap.parse_args(argv)
+
+    cfg = load_config(args.config)
+
+    if args.grid:
+        import yaml
+
+        with open(args.grid, "r", encoding="utf-8") as f:
+            spec = yaml.safe_load(f) or {}
+    else:
+        spec = grid_from_config(cfg)
+
+    rows = run_sweep(args.frames, cfg, spec, workers=max(1, args.workers), verify=args.verify)
+    rows.sort(key=lambda r: (r["trigger"], r["volume_mode"], r["value"], r["cooldown_sec"], r["emit"]))
+
+    out = open(args.out, "w", newline="", encoding="utf-8") if args.out else sys.stdout
+    try:
+        w = csv.DictWriter(out, fieldnames=list(rows[0].keys()))
+        w.writeheader()
+        w.writerows(rows)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+
+if __name__ == "__main__":
+    main()
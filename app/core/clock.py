@@ -0,0 +1,78 @@
+"""
+Час у pipeline - int ns, без datetime на гарячому шляху:
+
+- recv_ns / ts_ns: time.monotonic_ns() на прийомі фрейму (cooldown, recv -> alert latency)
+- exchange_ns: event time біржі в epoch ns (Binance "E"/"T", OKX "ts"), якщо є в payload
+
+datetime(UTC) робиться лише на межі sinks: to_datetime(mono_to_wall_ns(ts_ns)).
+"""
+
+from __future__ import annotations
+
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+NS_PER_MS = 1_000_000
+NS_PER_SEC = 1_000_000_000
+
+now_ns = time.monotonic_ns
+
+# monotonic -> wall; resync() періодично з runner (NTP може підкрутити wall clock)
+_mono_to_wall = time.time_ns() - time.monotonic_ns()
+
+
+def resync() -> None:
+    global _mono_to_wall
+    _mono_to_wall = time.time_ns() - time.monotonic_ns()
+
+
+def mono_to_wall_ns(mono_ns: int) -> int:
+    return mono_ns + _mono_to_wall
+
+
+def to_datetime(wall_ns: int) -> datetime:
+    return datetime.fromtimestamp(wall_ns / NS_PER_SEC, tz=timezone.utc)
+
+
+def ms_to_ns(v: Any) -> Optional[int]:
+    # "1700000000123" | 1700000000123 -> ns; None, якщо поля немає/невалідне
+    if v is None:
+        return None
+    try:
+        return int(v) * NS_PER_MS
+    except (TypeError, ValueError):
+        return None
+
+
+class LatencyStats:
+    """
+    Семпли latency (ns) між викликами summary(); summary() скидає вікно.
+    """
+
+    def __init__(self, max_samples: int = 100_000):
+        self.max_samples = max_samples
+        self._samples: List[int] = []
+        self.dropped = 0
+
+    def add(self, ns: int) -> None:
+        if len(self._samples) < self.max_samples:
+            self._samples.append(ns)
+        else:
+            self.dropped += 1
+
+    def summary(self) -> Optional[Dict[str, float]]:
+        s = self._samples
+        if not s:
+            return None
+        s.sort()
+        n = len(s)
+        out = {
+            "n": n,
+            "p50_ms": s[n // 2] / NS_PER_MS,
+            "p99_ms": s[min(n - 1, (n * 99) // 100)] / NS_PER_MS,
+            "max_ms": s[-1] / NS_PER_MS,
+        }
+        self._samples = []
+        self.dropped = 0
+        return out
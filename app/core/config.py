@@ -1,9 +1,20 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import Any, Dict, List, Optional
+import hashlib
+import os
+import pickle
+from dataclasses import dataclass, field, fields
+from typing import Any, Callable, Dict, List, Optional
 
-import yaml
+from app.core.triggers import TriggerConfig, compile_trigger
+
+# bump при зміні формату compiled файлу; зміни схеми/валідації підхоплює _schema_digest
+COMPILED_VERSION = 5
+COMPILED_DIR = ".compiled"
+
+
+class ConfigError(ValueError):
+    pass
 
 
 @dataclass(frozen=True)
@@ -11,11 +22,28 @@ class BinanceCfg:
     ws_url: str
     depth_stream: str
     top_n: int = 10
+    trade_stream: str = "aggTrade"    # підписується тільки якщо flow.enabled
+
+
+@dataclass(frozen=True)
+class OKXCfg:
+    ws_url: str = "wss://ws.okx.com:8443/ws/v5/public"
+    depth_stream: str = "books5"
+    top_n: int = 5
 
 
 @dataclass(frozen=True)
 class MetricsCfg:
     volume_mode: str = "notional"   # qty | notional
+    skip_unchanged: bool = True     # не перераховувати ідентичні snapshot-и
+
+
+@dataclass(frozen=True)
+class FlowCfg:
+    enabled: bool = False
+    window_sec: float = 60.0
+    bucket_sec: float = 1.0
+    publish_ms: int = 1000
 
 
 @dataclass(frozen=True)
@@ -25,25 +53,281 @@ class TelegramCfg:
     chat_id: str = ""
 
 
+@dataclass(frozen=True)
+class UniverseCfg:
+    enabled: bool = False
+    source: str = "rest"            # rest | file
+    rest_url: str = "https://api.binance.com"
+    fixture_path: str = ""
+    quote_asset: str = "USDT"
+    min_quote_volume: float = 0.0   # 24h quoteVolume
+    max_pairs: int = 100
+    exclude: List[str] = field(default_factory=list)
+    refresh_sec: float = 300.0
+
+
+@dataclass(frozen=True)
+class ConsolidatedCfg:
+    enabled: bool = False
+    top_n: int = 10
+    min_venues: int = 2
+    max_age_sec: float = 5.0
+    clip_common_depth: bool = True
+    metric_name: str = "consolidated_imbalance_ratio"
+    symbol_map: Dict[str, str] = field(default_factory=dict)
+
+
+@dataclass(frozen=True)
+class RuntimeCfg:
+    mode: str = "default"                  # default | performance
+    uvloop: bool = True                    # тільки в performance mode і якщо встановлено
+    ws_compression: Optional[str] = None   # deflate | none; None = дефолт для mode
+    ws_server_no_context_takeover: bool = False
+    ws_client_max_window_bits: Optional[int] = None
+    ws_server_max_window_bits: Optional[int] = None
+    ws_max_queue: Optional[int] = None
+    ws_max_size: Optional[int] = None
+    ws_rcvbuf_bytes: Optional[int] = None
+    startup_target_ms: float = 1500.0      # import -> перша метрика; 0 = не перевіряти
+
+
+@dataclass(frozen=True)
+class RecordCfg:
+    enabled: bool = False
+    path: str = "data/recorded/frames.jsonl"
+
+
+@dataclass(frozen=True)
+class CorrelationCfg:
+    enabled: bool = False
+    window_sec: float = 2.0         # ковзне вікно групи (trigger_name, direction)
+    bucket_sec: float = 0.25
+    min_pairs: int = 5              # >= стільки різних пар у вікні -> storm, далі одне агреговане сповіщення
+    top_pairs: int = 5              # скільки пар (по |value|) показувати в агрегаті
+
+
 @dataclass(frozen=True)
 class AppCfg:
     pairs: List[str]
     binance: BinanceCfg
     metrics: MetricsCfg
-    triggers: List[Dict[str, Any]]
+    triggers: List[TriggerConfig]
     sinks: List[Dict[str, Any]]
     telegram: TelegramCfg
+    universe: UniverseCfg = field(default_factory=UniverseCfg)
+    okx: OKXCfg = field(default_factory=OKXCfg)
+    consolidated: ConsolidatedCfg = field(default_factory=ConsolidatedCfg)
+    runtime: RuntimeCfg = field(default_factory=RuntimeCfg)
+    record: RecordCfg = field(default_factory=RecordCfg)
+    flow: FlowCfg = field(default_factory=FlowCfg)
+    correlation: CorrelationCfg = field(default_factory=CorrelationCfg)
+
+
+_SECTIONS: Dict[str, type] = {
+    "binance": BinanceCfg,
+    "okx": OKXCfg,
+    "metrics": MetricsCfg,
+    "telegram": TelegramCfg,
+    "universe": UniverseCfg,
+    "consolidated": ConsolidatedCfg,
+    "runtime": RuntimeCfg,
+    "record": RecordCfg,
+    "flow": FlowCfg,
+    "correlation": CorrelationCfg,
+}
+
+_CHOICES: Dict[tuple, tuple] = {
+    ("metrics", "volume_mode"): ("qty", "notional"),
+    ("binance", "trade_stream"): ("aggTrade", "trade"),   # події, які gateway роутить в on_trade
+    ("universe", "source"): ("rest", "file"),
+    ("runtime", "mode"): ("default", "performance"),
+    ("runtime", "ws_compression"): ("deflate", "none"),
+}
+
+# type -> допустимі ключі (див. app.core.sinks.build_sinks)
+SINK_KEYS: Dict[str, tuple] = {
+    "logger": ("level", "log_metrics"),
+    "shm": ("name", "max_rows", "top_n", "metrics"),
+    "stream": ("host", "port", "max_pending_triggers"),
+}
+KNOWN_SINK_TYPES = tuple(SINK_KEYS)
+
+
+def _opt(v: Any, conv: Callable[[Any], Any]) -> Any:
+    return None if v is None else conv(v)
+
 
+def _check_bools(where: str, sec: Dict[str, Any], cls: type) -> None:
+    # bool("false") == True - тому bool-поля приймаємо тільки як YAML true/false
+    for f in fields(cls):
+        v = sec.get(f.name)
+        if f.type == "bool" and v is not None and not isinstance(v, bool):
+            raise ConfigError(f"{where}.{f.name} must be true/false, got {v!r}")
 
-def load_config(path: str) -> AppCfg:
-    with open(path, "r", encoding="utf-8") as f:
-        raw = yaml.safe_load(f) or {}
 
+def validate_raw(raw: Any) -> None:
+    """
+    Строга схема: невідомі секції/ключі - помилка (а не тихе ігнорування опечатки).
+    Допустимі ключі секцій беруться з полів відповідних dataclass-ів.
+    """
+    if not isinstance(raw, dict):
+        raise ConfigError("Config root must be a mapping")
+
+    allowed_top = {"pairs", "triggers", "sinks", *_SECTIONS}
+    unknown = set(raw) - allowed_top
+    if unknown:
+        raise ConfigError(f"Unknown config sections: {sorted(unknown)}")
+
+    for name, cls in _SECTIONS.items():
+        sec = raw.get(name)
+        if sec is None:
+            continue
+        if not isinstance(sec, dict):
+            raise ConfigError(f"Section '{name}' must be a mapping")
+        unknown = set(sec) - {f.name for f in fields(cls)}
+        if unknown:
+            raise ConfigError(f"Unknown keys in '{name}': {sorted(unknown)}")
+        _check_bools(name, sec, cls)
+
+    pairs = raw.get("pairs") or []
+    if not isinstance(pairs, list) or not all(isinstance(p, str) for p in pairs):
+        raise ConfigError("'pairs' must be a list of strings")
+
+    trigger_keys = {f.name for f in fields(TriggerConfig)}
+    names = set()
+    for t in raw.get("triggers") or []:
+        if not isinstance(t, dict):
+            raise ConfigError(f"Trigger must be a mapping: {t!r}")
+        unknown = set(t) - trigger_keys
+        if unknown:
+            raise ConfigError(f"Unknown keys in trigger '{t.get('name')}': {sorted(unknown)}")
+        if t.get("name") in names:
+            raise ConfigError(f"Duplicate trigger name: {t.get('name')}")
+        _check_bools(f"triggers[{t.get('name')}]", t, TriggerConfig)
+        names.add(t.get("name"))
+
+    for sk in raw.get("sinks") or []:
+        if not isinstance(sk, dict):
+            raise ConfigError(f"Sink must be a mapping: {sk!r}")
+        st = str(sk.get("type") or "").lower()
+        if st not in KNOWN_SINK_TYPES:
+            raise ConfigError(f"Unknown sink type '{st}' (expected one of {KNOWN_SINK_TYPES})")
+        unknown = set(sk) - {"type", *SINK_KEYS[st]}
+        if unknown:
+            raise ConfigError(f"Unknown keys in sink '{st}': {sorted(unknown)}")
+
+
+def _check_choices(cfg: AppCfg) -> None:
+    for (section, key), choices in _CHOICES.items():
+        v = getattr(getattr(cfg, section), key)
+        if v is not None and v not in choices:
+            raise ConfigError(f"{section}.{key}='{v}' (expected one of {choices})")
+
+
+def build_config(raw: Dict[str, Any]) -> AppCfg:
+    validate_raw(raw)
+
+    try:
+        cfg = _build(raw)
+    except ConfigError:
+        raise
+    except (TypeError, ValueError) as e:
+        raise ConfigError(str(e)) from e
+
+    _check_choices(cfg)
+    return cfg
+
+
+def _schema_digest() -> bytes:
+    """
+    Відбиток схеми для ключа compiled кешу: source config.py/triggers.py (dataclass-и, дефолти,
+    правила валідації). Забута зміна COMPILED_VERSION не підніме старий AppCfg без нових полів.
+    """
+    import app.core.triggers as triggers
+
+    h = hashlib.sha256()
+    for mod_file in (__file__, triggers.__file__):
+        try:
+            with open(mod_file, "rb") as f:
+                h.update(f.read())
+        except OSError:
+            # без source (напр. тільки .pyc) - хоча б структура dataclass-ів
+            for cls in (AppCfg, *_SECTIONS.values(), TriggerConfig):
+                h.update(repr([(f.name, f.type, f.default) for f in fields(cls)]).encode())
+            break
+    return h.digest()
+
+
+def _compiled_path(path: str, digest: str) -> str:
+    d, name = os.path.split(os.path.abspath(path))
+    stem = os.path.splitext(name)[0]
+    return os.path.join(d, COMPILED_DIR, f"{stem}.{digest[:16]}.pickle")
+
+
+def _write_compiled(cache_path: str, cfg: AppCfg) -> None:
+    try:
+        d = os.path.dirname(cache_path)
+        os.makedirs(d, exist_ok=True)
+
+        stem = os.path.basename(cache_path).split(".", 1)[0]
+        for old in os.listdir(d):
+            if old.startswith(f"{stem}.") and old.endswith(".pickle"):
+                os.remove(os.path.join(d, old))
+
+        tmp = f"{cache_path}.tmp"
+        with open(tmp, "wb") as f:
+            pickle.dump(cfg, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, cache_path)
+    except OSError:
+        # read-only FS тощо - просто працюємо без кешу
+        pass
+
+
+def load_config(path: str, *, use_cache: bool = True) -> AppCfg:
+    """
+    YAML -> валідований AppCfg.
+    Результат кешується в <dir>/.compiled/<name>.<sha256>.pickle: поки не змінились YAML
+    і схема (_schema_digest), старт не імпортує yaml і не робить повторну валідацію/коерсію.
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+
+    digest = hashlib.sha256(data + f"|v{COMPILED_VERSION}|".encode() + _schema_digest()).hexdigest()
+    cache_path = _compiled_path(path, digest)
+
+    if use_cache:
+        try:
+            with open(cache_path, "rb") as f:
+                cfg = pickle.load(f)
+            if isinstance(cfg, AppCfg):
+                return cfg
+        except Exception:
+            pass
+
+    import yaml
+
+    raw = yaml.safe_load(data.decode("utf-8")) or {}
+    cfg = build_config(raw)
+
+    if use_cache:
+        _write_compiled(cache_path, cfg)
+
+    return cfg
+
+
+def _build(raw: Dict[str, Any]) -> AppCfg:
     pairs = list(raw.get("pairs") or [])
 
     b = raw.get("binance") or {}
     m = raw.get("metrics") or {}
     tg = raw.get("telegram") or {}
+    u = raw.get("universe") or {}
+    okx = raw.get("okx") or {}
+    cons = raw.get("consolidated") or {}
+    rt = raw.get("runtime") or {}
+    rec = raw.get("record") or {}
+    fl = raw.get("flow") or {}
+    cr = raw.get("correlation") or {}
 
     return AppCfg(
         pairs=pairs,
@@ -51,15 +335,73 @@ def load_config(path: str) -> AppCfg:
             ws_url=str(b.get("ws_url", "wss://stream.binance.com:9443/stream")),
             depth_stream=str(b.get("depth_stream", "depth10@100ms")),
             top_n=int(b.get("top_n", 10)),
+            trade_stream=str(b.get("trade_stream", "aggTrade")),
         ),
         metrics=MetricsCfg(
             volume_mode=str(m.get("volume_mode", "qty")),
+            skip_unchanged=bool(m.get("skip_unchanged", True)),
         ),
-        triggers=list(raw.get("triggers") or []),
+        triggers=[compile_trigger(t) for t in (raw.get("triggers") or [])],
         sinks=list(raw.get("sinks") or []),
         telegram=TelegramCfg(
             enabled=bool(tg.get("enabled", False)),
             bot_token=str(tg.get("bot_token", "")).strip(),
             chat_id=str(tg.get("chat_id", "")).strip(),
         ),
+        universe=UniverseCfg(
+            enabled=bool(u.get("enabled", False)),
+            source=str(u.get("source", "rest")).lower(),
+            rest_url=str(u.get("rest_url", "https://api.binance.com")),
+            fixture_path=str(u.get("fixture_path", "")),
+            quote_asset=str(u.get("quote_asset", "USDT")).upper(),
+            min_quote_volume=float(u.get("min_quote_volume", 0.0)),
+            max_pairs=int(u.get("max_pairs", 100)),
+            exclude=[str(x).upper() for x in (u.get("exclude") or [])],
+            refresh_sec=float(u.get("refresh_sec", 300.0)),
+        ),
+        okx=OKXCfg(
+            ws_url=str(okx.get("ws_url", "wss://ws.okx.com:8443/ws/v5/public")),
+            depth_stream=str(okx.get("depth_stream", "books5")),
+            top_n=int(okx.get("top_n", 5)),
+        ),
+        consolidated=ConsolidatedCfg(
+            enabled=bool(cons.get("enabled", False)),
+            top_n=int(cons.get("top_n", 10)),
+            min_venues=int(cons.get("min_venues", 2)),
+            max_age_sec=float(cons.get("max_age_sec", 5.0)),
+            clip_common_depth=bool(cons.get("clip_common_depth", True)),
+            metric_name=str(cons.get("metric_name", "consolidated_imbalance_ratio")),
+            symbol_map={
+                str(k).upper(): str(v).upper() for k, v in (cons.get("symbol_map") or {}).items()
+            },
+        ),
+        runtime=RuntimeCfg(
+            mode=str(rt.get("mode", "default")).lower(),
+            uvloop=bool(rt.get("uvloop", True)),
+            ws_compression=_opt(rt.get("ws_compression"), lambda v: str(v).lower()),
+            ws_server_no_context_takeover=bool(rt.get("ws_server_no_context_takeover", False)),
+            ws_client_max_window_bits=_opt(rt.get("ws_client_max_window_bits"), int),
+            ws_server_max_window_bits=_opt(rt.get("ws_server_max_window_bits"), int),
+            ws_max_queue=_opt(rt.get("ws_max_queue"), int),
+            ws_max_size=_opt(rt.get("ws_max_size"), int),
+            ws_rcvbuf_bytes=_opt(rt.get("ws_rcvbuf_bytes"), int),
+            startup_target_ms=float(rt.get("startup_target_ms", 1500.0)),
+        ),
+        record=RecordCfg(
+            enabled=bool(rec.get("enabled", False)),
+            path=str(rec.get("path", "data/recorded/frames.jsonl")),
+        ),
+        flow=FlowCfg(
+            enabled=bool(fl.get("enabled", False)),
+            window_sec=float(fl.get("window_sec", 60.0)),
+            bucket_sec=float(fl.get("bucket_sec", 1.0)),
+            publish_ms=int(fl.get("publish_ms", 1000)),
+        ),
+        correlation=CorrelationCfg(
+            enabled=bool(cr.get("enabled", False)),
+            window_sec=float(cr.get("window_sec", 2.0)),
+            bucket_sec=float(cr.get("bucket_sec", 0.25)),
+            min_pairs=int(cr.get("min_pairs", 5)),
+            top_pairs=int(cr.get("top_pairs", 5)),
+        ),
     )
@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import heapq
+from dataclasses import replace
+from operator import attrgetter
+from typing import Callable, Dict, List, Mapping, Optional, Sequence
+
+from app.core.clock import NS_PER_SEC, now_ns
+from app.core.models import Level, OrderBook
+
+_price = attrgetter("price")
+
+
+def canonical_symbol(pair: str, symbol_map: Optional[Mapping[str, str]] = None) -> str:
+    # "BTC-USDT" / "btc_usdt" / "BTC/USDT" -> "BTCUSDT"; symbol_map для нестандартних назв (XBT -> BTC тощо)
+    p = (pair or "").upper()
+    if symbol_map and p in symbol_map:
+        return symbol_map[p]
+    p = p.replace("-", "").replace("_", "").replace("/", "")
+    if symbol_map and p in symbol_map:
+        return symbol_map[p]
+    return p
+
+
+def merge_levels(
+    ladders: Sequence[List[Level]],
+    *,
+    reverse: bool,
+    top_n: int,
+    clip_common_depth: bool = True,
+) -> List[Level]:
+    """
+    k-way merge вже відсортованих ladder-ів (bids: desc, asks: asc) без concat+sort.
+    Однакові ціни з різних бірж сумуються. Зупиняємось, щойно набрали top_n рівнів.
+
+    clip_common_depth: не виходимо за межі ціни, яку бачать всі біржі
+    (інакше біржа з глибшим top-N перекошує агрегований обсяг).
+    """
+    ladders = [l for l in ladders if l]
+    if not ladders:
+        return []
+
+    bound: Optional[float] = None
+    if clip_common_depth and len(ladders) > 1:
+        tails = [l[-1].price for l in ladders]
+        bound = max(tails) if reverse else min(tails)
+
+    out: List[Level] = []
+    cur_price: Optional[float] = None
+    cur_qty = 0.0
+
+    for lvl in heapq.merge(*ladders, key=_price, reverse=reverse):
+        p = lvl.price
+        if bound is not None and ((p < bound) if reverse else (p > bound)):
+            break
+        if p == cur_price:
+            cur_qty += lvl.qty
+            continue
+        if cur_price is not None:
+            out.append(Level(price=cur_price, qty=cur_qty))
+            if len(out) >= top_n:
+                return out
+        cur_price = p
+        cur_qty = lvl.qty
+
+    if cur_price is not None and len(out) < top_n:
+        out.append(Level(price=cur_price, qty=cur_qty))
+
+    return out
+
+
+class ConsolidatedBook:
+    """
+    Останній top-N стакан по кожній біржі для одного активу -> агрегований ladder.
+    Оновлюється інкрементально: при апдейті однієї біржі перемерджуємо тільки цей актив.
+
+    Staleness (max_age_sec) - по liveness з'єднання біржі, а не по часу останньої зміни стакану:
+    last_seen(venue) -> monotonic ns останнього фрейму/heartbeat з'єднання (VenueWSClient.last_recv_ns).
+    Тихий, але підключений стакан (OKX books5 пушить лише на зміну) лишається в агрегаті.
+    Без last_seen (replay/backtest) - по recv_ns самого стакану, тобто max_age_sec
+    передбачає, що біржа шле snapshot-и і без змін (Binance depthN@100ms).
+    """
+
+    def __init__(
+        self,
+        *,
+        top_n: int = 10,
+        min_venues: int = 2,
+        max_age_sec: float = 5.0,
+        symbol_map: Optional[Mapping[str, str]] = None,
+        clip_common_depth: bool = True,
+        last_seen: Optional[Callable[[str], int]] = None,
+    ):
+        self.top_n = top_n
+        self.min_venues = min_venues
+        self.max_age_sec = max_age_sec
+        self.symbol_map = {k.upper(): v.upper() for k, v in (symbol_map or {}).items()}
+        self.clip_common_depth = clip_common_depth
+        self.last_seen = last_seen
+        self._books: Dict[str, Dict[str, OrderBook]] = {}  # asset -> venue -> book
+
+    def update(self, venue: str, ob: OrderBook) -> Optional[OrderBook]:
+        asset = canonical_symbol(ob.pair, self.symbol_map)
+        venues = self._books.setdefault(asset, {})
+        venues[venue] = ob
+
+        now = ob.recv_ns or now_ns()
+        if self.max_age_sec > 0:
+            # біржа, що відвалилась, не повинна тримати свій старий стакан в агрегаті
+            max_age_ns = self.max_age_sec * NS_PER_SEC
+            stale = [v for v, b in venues.items() if now - self._seen(v, b) > max_age_ns]
+            for v in stale:
+                del venues[v]
+
+        if len(venues) < self.min_venues:
+            return None
+
+        books = list(venues.values())
+        bids = merge_levels(
+            [b.bids for b in books],
+            reverse=True,
+            top_n=self.top_n,
+            clip_common_depth=self.clip_common_depth,
+        )
+        asks = merge_levels(
+            [b.asks for b in books],
+            reverse=False,
+            top_n=self.top_n,
+            clip_common_depth=self.clip_common_depth,
+        )
+
+        return OrderBook(
+            pair=asset,
+            bids=bids,
+            asks=asks,
+            last_update_id=None,
+            exchange_ns=ob.exchange_ns,
+            recv_ns=now,
+        )
+
+    def touch(self, venue: str, pair: str, recv_ns: int) -> None:
+        # незмінений snapshot: стакан біржі той самий, але свіжий на recv_ns
+        venues = self._books.get(canonical_symbol(pair, self.symbol_map))
+        ob = venues.get(venue) if venues else None
+        if ob is not None and recv_ns > ob.recv_ns:
+            venues[venue] = replace(ob, recv_ns=recv_ns)
+
+    def _seen(self, venue: str, ob: OrderBook) -> int:
+        seen = ob.recv_ns
+        if self.last_seen is not None:
+            seen = max(seen, self.last_seen(venue) or 0)
+        return seen or now_ns()
+
+    def venues(self, pair: str) -> List[str]:
+        return list(self._books.get(canonical_symbol(pair, self.symbol_map), {}))
@@ -0,0 +1,204 @@
+from __future__ import annotations
+
+from typing import Dict, List, Optional, Tuple
+
+from app.core.clock import NS_PER_SEC, now_ns
+from app.core.models import TriggerEvent
+
+GroupKey = Tuple[str, bool]  # (trigger_name, buy)
+
+
+def direction(ev: TriggerEvent) -> str:
+    return "BUY" if ev.metric_value >= 0 else "SELL"
+
+
+class _Group:
+    """
+    Ковзне вікно однієї групи: ring buffer з time-bucket-ів, у кожному - остання подія по парі.
+    counts[pair] - у скількох bucket-ах є пара, len(counts) - кількість різних пар у вікні.
+    Зсув вікна - amortized O(1) на подію (кожен bucket очищається один раз), як в flow.RollingSums.
+    """
+
+    __slots__ = ("n", "buckets", "counts", "head", "storm", "pending", "delivered", "last_emit_ns")
+
+    def __init__(self, n: int):
+        self.n = n
+        self.buckets: List[Dict[str, TriggerEvent]] = [{} for _ in range(n)]
+        self.counts: Dict[str, int] = {}
+        self.head = -1
+        self.storm = False
+        self.pending: Dict[str, TriggerEvent] = {}  # події під час storm, ще не віддані агрегатом
+        self.delivered: Dict[str, TriggerEvent] = {}  # остання подія по парі, що пройшла окремо (у вікні)
+        self.last_emit_ns = 0
+
+    def advance(self, bid: int) -> None:
+        head = self.head
+        if bid <= head:
+            return
+
+        if head < 0 or bid - head >= self.n:
+            for b in self.buckets:
+                b.clear()
+            self.counts.clear()
+            self.delivered.clear()
+        else:
+            counts = self.counts
+            for b in range(head + 1, bid + 1):
+                bucket = self.buckets[b % self.n]
+                for pair in bucket:
+                    c = counts[pair] - 1
+                    if c:
+                        counts[pair] = c
+                    else:
+                        del counts[pair]
+                        self.delivered.pop(pair, None)
+                bucket.clear()
+
+        self.head = bid
+
+    def add(self, bid: int, ev: TriggerEvent) -> None:
+        self.advance(bid)
+        bucket = self.buckets[bid % self.n]
+        if ev.pair not in bucket:
+            self.counts[ev.pair] = self.counts.get(ev.pair, 0) + 1
+        bucket[ev.pair] = ev
+
+    def window_events(self) -> List[TriggerEvent]:
+        # остання подія по кожній парі у вікні
+        latest: Dict[str, TriggerEvent] = {}
+        for k in range(self.n):
+            bucket = self.buckets[(self.head - k) % self.n]
+            for pair, ev in bucket.items():
+                if pair not in latest:
+                    latest[pair] = ev
+        return list(latest.values())
+
+
+class AlertCorrelator:
+    """
+    Стадія між TriggerEngine і sinks: групує події по (trigger_name, direction) у ковзному вікні.
+
+    - поки в групі < min_pairs різних пар за window_sec - подія проходить одразу, без затримки;
+    - на min_pairs-й парі група переходить у storm: одне агреговане сповіщення по всьому вікну
+      (перші min_pairs-1 пар вже пішли окремо - агрегат їх включає і рахує в already_sent),
+      далі нові події групи накопичуються і віддаються flush() не частіше ніж раз на window_sec;
+    - storm закінчується, коли у вікні лишилось < min_pairs пар (залишок pending - фінальним агрегатом);
+      якщо за період у pending лише одна пара - вона віддається як звичайна подія, без агрегату.
+
+    flush() викликається періодично (раз на bucket_sec) з runner.
+    """
+
+    def __init__(
+        self,
+        *,
+        window_sec: float = 2.0,
+        bucket_sec: float = 0.25,
+        min_pairs: int = 5,
+        top_pairs: int = 5,
+    ):
+        self.bucket_ns = max(1, int(bucket_sec * NS_PER_SEC))
+        self.n = max(1, -(-int(window_sec * NS_PER_SEC) // self.bucket_ns))
+        self.window_ns = self.n * self.bucket_ns
+        self.min_pairs = max(2, int(min_pairs))
+        self.top_pairs = max(1, int(top_pairs))
+        self._groups: Dict[GroupKey, _Group] = {}
+
+        self.passed = 0
+        self.suppressed = 0
+        self.aggregated = 0
+
+    def process(self, ev: TriggerEvent, now: Optional[int] = None) -> List[TriggerEvent]:
+        now = now if now is not None else (ev.ts_ns or now_ns())
+        key = (ev.trigger_name, ev.metric_value >= 0)
+
+        g = self._groups.get(key)
+        if g is None:
+            g = self._groups[key] = _Group(self.n)
+
+        g.add(now // self.bucket_ns, ev)
+
+        if g.storm:
+            g.pending[ev.pair] = ev
+            self.suppressed += 1
+            return []
+
+        if len(g.counts) >= self.min_pairs:
+            g.storm = True
+            g.last_emit_ns = now
+            self.suppressed += 1
+            # агрегат описує весь storm у вікні, включно з парами, що вже пішли окремо до нього
+            events = g.window_events()
+            sent = sum(1 for e in events if g.delivered.get(e.pair) is e)
+            g.delivered.clear()
+            return [self._aggregate(events, already_sent=sent)]
+
+        g.delivered[ev.pair] = ev
+        self.passed += 1
+        return [ev]
+
+    def flush(self, now: Optional[int] = None) -> List[TriggerEvent]:
+        now = now if now is not None else now_ns()
+        bid = now // self.bucket_ns
+        out: List[TriggerEvent] = []
+
+        for key in list(self._groups):
+            g = self._groups[key]
+            g.advance(bid)
+
+            if g.storm:
+                over = len(g.counts) < self.min_pairs
+                if g.pending and (over or now - g.last_emit_ns >= self.window_ns):
+                    if len(g.pending) == 1:
+                        # одна пара за період - це не storm-агрегат, віддаємо подію як є
+                        out.extend(g.pending.values())
+                        self.suppressed -= 1
+                        self.passed += 1
+                    else:
+                        out.append(self._aggregate(list(g.pending.values())))
+                    g.pending.clear()
+                    g.last_emit_ns = now
+                if over:
+                    g.storm = False
+
+            if not g.storm and not g.counts:
+                del self._groups[key]
+
+        return out
+
+    def _aggregate(self, events: List[TriggerEvent], already_sent: int = 0) -> TriggerEvent:
+        events.sort(key=lambda e: abs(e.metric_value), reverse=True)
+        head = events[0]
+        latest = max(events, key=lambda e: e.ts_ns)
+        n = len(events)
+        top = tuple((e.pair, e.metric_value) for e in events[: self.top_pairs])
+
+        mean = sum(e.metric_value for e in events) / n
+        top_txt = ", ".join(f"{p} {v:+.3f}" for p, v in top)
+        msg = f"{head.trigger_name}: {n} pairs {direction(head)} pressure | {head.metric} mean={mean:+.6f} | top: {top_txt}"
+        if already_sent:
+            msg += f" | incl. {already_sent} already alerted"
+
+        self.aggregated += 1
+        return TriggerEvent(
+            pair=f"{n} pairs",
+            trigger_name=head.trigger_name,
+            metric=head.metric,
+            metric_value=mean,
+            bid_volume=sum(e.bid_volume for e in events),
+            ask_volume=sum(e.ask_volume for e in events),
+            ts_ns=latest.ts_ns,
+            message=msg,
+            exchange_ns=latest.exchange_ns,
+            group_size=n,
+            pairs=top,
+            group_pairs=frozenset(e.pair for e in events),
+            already_sent=already_sent,
+        )
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "passed": self.passed,
+            "suppressed": self.suppressed,
+            "aggregated": self.aggregated,
+            "storms": sum(1 for g in self._groups.values() if g.storm),
+        }
@@ -0,0 +1,200 @@
+from __future__ import annotations
+
+from typing import Dict, List, Optional
+
+from app.core.clock import NS_PER_MS, mono_to_wall_ns, now_ns
+from app.core.models import MetricPoint, OrderBook
+
+TRADE_DELTA_METRIC = "trade_delta_ratio"   # (buy - sell) / (buy + sell) по aggressor volume
+OFI_METRIC = "ofi_ratio"                   # (ofi+ - ofi-) / (ofi+ + ofi-) по змінах top-of-book
+
+
+class RollingSums:
+    """
+    Ковзне вікно з фіксованою кількістю time-bucket-ів (ring buffer), k каналів.
+    add() - O(1); зсув вікна - amortized O(1) (кожен bucket очищається один раз).
+    """
+
+    __slots__ = ("bucket_ms", "n", "channels", "_vals", "_head", "totals")
+
+    def __init__(self, window_ms: int, bucket_ms: int, channels: int = 2):
+        self.bucket_ms = max(1, int(bucket_ms))
+        self.n = max(1, -(-int(window_ms) // self.bucket_ms))
+        self.channels = channels
+        self._vals: List[List[float]] = [[0.0] * channels for _ in range(self.n)]
+        self._head = -1
+        self.totals: List[float] = [0.0] * channels
+
+    def _clear_all(self) -> None:
+        for row in self._vals:
+            for c in range(self.channels):
+                row[c] = 0.0
+        for c in range(self.channels):
+            self.totals[c] = 0.0
+
+    def advance(self, ts_ms: int) -> None:
+        bid = ts_ms // self.bucket_ms
+        head = self._head
+        if bid <= head:
+            return
+
+        if head < 0 or bid - head >= self.n:
+            self._clear_all()
+        else:
+            totals = self.totals
+            for b in range(head + 1, bid + 1):
+                row = self._vals[b % self.n]
+                for c in range(self.channels):
+                    totals[c] -= row[c]
+                    row[c] = 0.0
+                if b % self.n == 0:
+                    # раз на повний оберт перераховуємо totals, щоб не накопичувати float drift
+                    for c in range(self.channels):
+                        totals[c] = sum(r[c] for r in self._vals)
+
+        self._head = bid
+
+    def add(self, ts_ms: int, ch: int, v: float) -> None:
+        bid = ts_ms // self.bucket_ms
+        if bid > self._head:
+            self.advance(ts_ms)
+        elif bid <= self._head - self.n:
+            return  # старіше за вікно
+
+        self._vals[bid % self.n][ch] += v
+        self.totals[ch] += v
+
+
+def _ratio(pos: float, neg: float) -> float:
+    total = pos + neg
+    return (pos - neg) / total if total > 0 else 0.0
+
+
+class _PairFlow:
+    __slots__ = ("trades", "ofi", "top", "last_trade_pub", "last_ofi_pub")
+
+    def __init__(self, window_ms: int, bucket_ms: int):
+        self.trades = RollingSums(window_ms, bucket_ms, 2)  # buy, sell
+        self.ofi = RollingSums(window_ms, bucket_ms, 2)     # ofi+, ofi-
+        self.top: Optional[tuple] = None                    # (bid_p, bid_q, ask_p, ask_q)
+        self.last_trade_pub = 0
+        self.last_ofi_pub = 0
+
+
+class FlowTracker:
+    """
+    Per-pair order flow:
+      - aggTrade: rolling buy/sell aggressor volume -> trade_delta_ratio
+      - OFI (Cont/Kukanov/Stoikov) по послідовних змінах best bid/ask -> ofi_ratio
+    Метрики публікуються не частіше за publish_ms на пару (trade rate BTCUSDT - сотні/сек).
+    """
+
+    def __init__(
+        self,
+        *,
+        window_sec: float = 60.0,
+        bucket_sec: float = 1.0,
+        publish_ms: int = 1000,
+        volume_mode: str = "qty",
+    ):
+        self.window_ms = int(window_sec * 1000)
+        self.bucket_ms = int(bucket_sec * 1000)
+        self.publish_ms = int(publish_ms)
+        self.notional = volume_mode == "notional"
+        self._pairs: Dict[str, _PairFlow] = {}
+
+    def _get(self, pair: str) -> _PairFlow:
+        pf = self._pairs.get(pair)
+        if pf is None:
+            pf = self._pairs[pair] = _PairFlow(self.window_ms, self.bucket_ms)
+        return pf
+
+    def forget(self, pair: str) -> None:
+        # пара прибрана з підписки (universe refresh)
+        self._pairs.pop(pair, None)
+
+    def on_trade(
+        self,
+        pair: str,
+        ts_ms: int,
+        price: float,
+        qty: float,
+        buyer_is_maker: bool,
+        recv_ns: Optional[int] = None,
+    ) -> Optional[MetricPoint]:
+        # ts_ms - trade time біржі ("T"); recv_ns - monotonic прийому фрейму
+        pf = self._get(pair)
+        v = price * qty if self.notional else qty
+
+        # buyer = maker -> агресор продавець
+        pf.trades.add(ts_ms, 1 if buyer_is_maker else 0, v)
+
+        if ts_ms - pf.last_trade_pub < self.publish_ms:
+            return None
+        pf.last_trade_pub = ts_ms
+
+        buy, sell = pf.trades.totals
+        return MetricPoint(
+            pair=pair,
+            name=TRADE_DELTA_METRIC,
+            value=_ratio(buy, sell),
+            bid_volume=buy,
+            ask_volume=sell,
+            ts_ns=recv_ns or now_ns(),
+            exchange_ns=ts_ms * NS_PER_MS,
+        )
+
+    def on_book(self, ob: OrderBook, ts_ms: Optional[int] = None) -> Optional[MetricPoint]:
+        if not ob.bids or not ob.asks:
+            return None
+
+        if ts_ms is None:
+            # локальний (монотонний) час прийому - не йде назад, навіть якщо E/ts відсутні
+            ts_ms = mono_to_wall_ns(ob.recv_ns or now_ns()) // NS_PER_MS
+
+        pf = self._get(ob.pair)
+        b, a = ob.bids[0], ob.asks[0]
+        if self.notional:
+            top = (b.price, b.price * b.qty, a.price, a.price * a.qty)
+        else:
+            top = (b.price, b.qty, a.price, a.qty)
+
+        prev = pf.top
+        pf.top = top
+        if prev is None:
+            return None
+
+        bp, bq, ap, aq = top
+        bp0, bq0, ap0, aq0 = prev
+
+        e = 0.0
+        if bp >= bp0:
+            e += bq
+        if bp <= bp0:
+            e -= bq0
+        if ap <= ap0:
+            e -= aq
+        if ap >= ap0:
+            e += aq0
+
+        if e > 0:
+            pf.ofi.add(ts_ms, 0, e)
+        elif e < 0:
+            pf.ofi.add(ts_ms, 1, -e)
+        else:
+            pf.ofi.advance(ts_ms)
+
+        if ts_ms - pf.last_ofi_pub < self.publish_ms:
+            return None
+        pf.last_ofi_pub = ts_ms
+
+        pos, neg = pf.ofi.totals
+        return MetricPoint(
+            pair=ob.pair,
+            name=OFI_METRIC,
+            value=_ratio(pos, neg),
+            bid_volume=pos,
+            ask_volume=neg,
+            ts_ns=ob.recv_ns or now_ns(),
+            exchange_ns=ob.exchange_ns,
+        )
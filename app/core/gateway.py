@@ -10,6 +10,9 @@ RawMsg = Dict[str, Any]
 Middleware = Callable[[RawMsg], Awaitable[Optional[RawMsg]]]
 Handler = Callable[[RawMsg], Awaitable[None]]
 
+# службові поля combined-stream обгортки, які переносяться в data
+ENVELOPE_KEYS = ("_venue", "_recv_ns")
+
 
 def pair_from_stream(stream: str) -> Optional[str]:
     # "btcusdt@depth10@100ms" -> "BTCUSDT"
@@ -23,6 +26,7 @@ def create_gateway(
     *,
     middlewares: List[Middleware],
     on_depth: List[Handler],
+    on_trade: Optional[List[Handler]] = None,
     queue_max: int = 5000,
 ):
     """
@@ -33,6 +37,7 @@ def create_gateway(
       - stop()
     """
     q: asyncio.Queue[RawMsg] = asyncio.Queue(maxsize=queue_max)
+    trade_handlers = list(on_trade or [])
     stop_event = asyncio.Event()
 
     async def apply_middlewares(msg: RawMsg) -> Optional[RawMsg]:
@@ -67,6 +72,11 @@ def create_gateway(
                 stream = out.get("stream")
                 data = out.get("data") if isinstance(out.get("data"), dict) else out
 
+                if data is not out:
+                    for k in ENVELOPE_KEYS:
+                        if k in out:
+                            data[k] = out[k]
+
                 if isinstance(stream, str):
                     p = pair_from_stream(stream)
                     if p:
@@ -82,6 +92,9 @@ def create_gateway(
                 if is_partial or is_diff:
                     for h in on_depth:
                         await h(data)
+                elif trade_handlers and data.get("e") in ("aggTrade", "trade"):
+                    for h in trade_handlers:
+                        await h(data)
 
             except Exception as e:
                 logger.exception("Gateway error: {}", e)
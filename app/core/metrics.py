@@ -1,6 +1,5 @@
 from __future__ import annotations
 
-from datetime import datetime, timezone
 from typing import Iterable, Literal
 
 from app.core.models import Level, MetricPoint, OrderBook
@@ -36,5 +35,6 @@ def calc_imbalance_ratio(
         value=float(ratio),
         bid_volume=float(bid_vol),
         ask_volume=float(ask_vol),
-        ts=datetime.now(timezone.utc),
+        ts_ns=ob.recv_ns,
+        exchange_ns=ob.exchange_ns,
     )
@@ -2,7 +2,9 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from datetime import datetime
-from typing import List, Optional
+from typing import FrozenSet, List, Optional, Tuple
+
+from app.core.clock import mono_to_wall_ns, to_datetime
 
 
 @dataclass(frozen=True)
@@ -17,7 +19,12 @@ class OrderBook:
     bids: List[Level]
     asks: List[Level]
     last_update_id: Optional[int] = None
-    updated_at: Optional[datetime] = None
+    exchange_ns: Optional[int] = None   # event time біржі (epoch ns), якщо є в payload
+    recv_ns: int = 0                    # monotonic ns прийому фрейму
+
+    @property
+    def updated_at(self) -> Optional[datetime]:
+        return to_datetime(mono_to_wall_ns(self.recv_ns)) if self.recv_ns else None
 
 
 @dataclass(frozen=True)
@@ -27,7 +34,12 @@ class MetricPoint:
     value: float
     bid_volume: float
     ask_volume: float
-    ts: datetime
+    ts_ns: int                          # monotonic ns (recv стакану/трейду, з якого пораховано)
+    exchange_ns: Optional[int] = None   # event time біржі (epoch ns)
+
+    @property
+    def ts(self) -> datetime:
+        return to_datetime(mono_to_wall_ns(self.ts_ns))
 
 
 @dataclass(frozen=True)
@@ -38,5 +50,17 @@ class TriggerEvent:
     metric_value: float
     bid_volume: float
     ask_volume: float
-    ts: datetime
+    ts_ns: int
     message: str
+    exchange_ns: Optional[int] = None
+    # агреговане сповіщення (app.core.correlation): group_size пар, top пари (pair, value) по |value|,
+    # group_pairs - усі пари групи (для маршрутизації підписникам),
+    # already_sent - скільки з них вже пішли окремими сповіщеннями до початку storm
+    group_size: int = 1
+    pairs: Tuple[Tuple[str, float], ...] = ()
+    group_pairs: FrozenSet[str] = frozenset()
+    already_sent: int = 0
+
+    @property
+    def ts(self) -> datetime:
+        return to_datetime(mono_to_wall_ns(self.ts_ns))
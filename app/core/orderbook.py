@@ -1,8 +1,8 @@
 from __future__ import annotations
 
-from datetime import datetime, timezone
 from typing import Any, Iterable, List, Optional
 
+from app.core.clock import now_ns
 from app.core.models import Level, OrderBook
 
 
@@ -45,6 +45,8 @@ def build_orderbook(
     asks_raw: Iterable[Iterable[Any]],
     top_n: int,
     last_update_id: Optional[int] = None,
+    exchange_ns: Optional[int] = None,
+    recv_ns: Optional[int] = None,
 ) -> OrderBook:
     bids = parse_levels(bids_raw, top_n=top_n, reverse=True)
     asks = parse_levels(asks_raw, top_n=top_n, reverse=False)
@@ -54,5 +56,6 @@ def build_orderbook(
         bids=bids,
         asks=asks,
         last_update_id=last_update_id,
-        updated_at=datetime.now(timezone.utc),
+        exchange_ns=exchange_ns,
+        recv_ns=recv_ns or now_ns(),
     )
@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import json
+import os
+import random
+import time
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from loguru import logger
+
+from app.core.clock import NS_PER_MS, mono_to_wall_ns
+
+RawMsg = Dict[str, Any]
+
+# Формат запису: JSON lines, один gateway-повідомлення на рядок (як прийшло з WS, після decode),
+# плюс "_recv_ms" - локальний wall-clock час отримання (depth10 snapshot-и не мають власного часу).
+RECV_TS_KEY = "_recv_ms"
+
+
+def create_recorder(path: str):
+    """
+    Middleware, що пише сирі повідомлення у файл для replay/backtest.
+    Повертає (middleware, close).
+    """
+    d = os.path.dirname(path)
+    if d:
+        os.makedirs(d, exist_ok=True)
+
+    f = open(path, "a", encoding="utf-8", buffering=1 << 16)
+    logger.info("Recording raw frames -> {}", path)
+
+    async def record(msg: RawMsg) -> Optional[RawMsg]:
+        # "_recv_ns" - monotonic цього процесу, у файлі він безглуздий -> пишемо wall ms
+        out = {k: v for k, v in msg.items() if k != "_recv_ns"}
+        if RECV_TS_KEY not in out:
+            recv_ns = msg.get("_recv_ns")
+            out[RECV_TS_KEY] = (
+                mono_to_wall_ns(recv_ns) // NS_PER_MS if recv_ns else int(time.time() * 1000)
+            )
+        f.write(json.dumps(out, separators=(",", ":")))
+        f.write("\n")
+        return msg
+
+    def close() -> None:
+        try:
+            f.close()
+        except Exception:
+            pass
+
+    return record, close
+
+
+def iter_frames(path: str) -> Iterator[str]:
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield line
+
+
+def load_frames(path: str, limit: int = 0) -> List[str]:
+    out: List[str] = []
+    for line in iter_frames(path):
+        out.append(line)
+        if limit and len(out) >= limit:
+            break
+    return out
+
+
+def synthetic_depth_frames(
+    pairs: Sequence[str],
+    n: int,
+    *,
+    top_n: int = 10,
+    depth_stream: str = "depth10@100ms",
+    start_ms: int = 1_700_000_000_000,
+    step_ms: int = 100,
+    seed: int = 7,
+) -> List[str]:
+    """
+    Синтетичні Binance combined-stream depth snapshot-и (random walk ціни + шум обсягів)
+    у тому ж форматі, що пише create_recorder. Для benchmark-ів без реального запису.
+    """
+    rnd = random.Random(seed)
+    mids: Dict[str, Tuple[float, float]] = {p.upper(): (100.0 + 10 * i, 0.01) for i, p in enumerate(pairs)}
+    ids = {p: 1 for p in mids}
+
+    out: List[str] = []
+    for i in range(n):
+        p = list(mids)[i % len(mids)]
+        mid, tick = mids[p]
+        mid = max(tick * 10, mid + rnd.gauss(0.0, tick * 2))
+        mids[p] = (mid, tick)
+        ids[p] += rnd.randint(1, 20)
+
+        bids = [[f"{mid - tick * (k + 1):.2f}", f"{rnd.expovariate(1.0) * 10:.4f}"] for k in range(top_n)]
+        asks = [[f"{mid + tick * (k + 1):.2f}", f"{rnd.expovariate(1.0) * 10:.4f}"] for k in range(top_n)]
+
+        msg = {
+            "stream": f"{p.lower()}@{depth_stream}",
+            "data": {"lastUpdateId": ids[p], "bids": bids, "asks": asks},
+            RECV_TS_KEY: start_ms + (i // len(mids)) * step_ms,
+        }
+        out.append(json.dumps(msg, separators=(",", ":")))
+
+    return out
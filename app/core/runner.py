@@ -1,18 +1,28 @@
 from __future__ import annotations
 
 import asyncio
-from typing import Any, Dict, List
+import time
+from dataclasses import replace
+from typing import Any, Dict, List, Optional, Sequence, Union
 
 from loguru import logger
 
-from app.core.config import load_config
+from app.core import clock
+from app.core.config import AppCfg, load_config
+from app.core.consolidated import ConsolidatedBook
+from app.core.correlation import AlertCorrelator
+from app.core.dedup import BookChangeCache
+from app.core.flow import FlowTracker
 from app.core.metrics import calc_imbalance_ratio
+from app.core.models import MetricPoint, TriggerEvent
+from app.core.replay import create_recorder
+from app.core.runtime import is_performance, run_event_loop
 from app.core.sinks import build_sinks
-from app.core.triggers import TriggerConfig, TriggerEngine
+from app.core.triggers import TriggerConfig, TriggerEngine, compile_trigger
 from app.core.gateway import create_gateway
 
-from app.exchanges.binance.ws import BinanceWSClient, BinanceWSOptions
-from app.exchanges.binance.parser import parse_depth_event
+from app.exchanges.base import DEFAULT_VENUE, ExchangeAdapter
+from app.exchanges.registry import build_adapter, group_pairs_by_venue
 
 
 # ---- middlewares ----
@@ -29,71 +39,313 @@ async def only_depth_streams(msg: Dict[str, Any]):
     return msg
 
 
-def build_trigger_engine(cfg_triggers: List[Dict[str, Any]]) -> TriggerEngine:
-    triggers: List[TriggerConfig] = []
-    for t in cfg_triggers:
-        triggers.append(
-            TriggerConfig(
-                name=str(t.get("name")),
-                metric=str(t.get("metric", "imbalance_ratio")),
-                op=str(t.get("op", ">=")),
-                value=float(t.get("value", 0.0)),
-                cooldown_sec=float(t.get("cooldown_sec", 0.0)),
-                emit=str(t.get("emit", "edge")),
-            )
-        )
+def only_depth_and_trade_streams(trade_stream: str):
+    # trade_stream з cfg.binance ("aggTrade" | "trade") -> "btcusdt@aggTrade"
+    trade_tag = f"@{trade_stream}"
+
+    async def middleware(msg: Dict[str, Any]):
+        stream = msg.get("stream")
+        if isinstance(stream, str):
+            return msg if ("@depth" in stream or stream.endswith(trade_tag)) else None
+        return msg
+
+    return middleware
+
+
+def build_trigger_engine(cfg_triggers: Sequence[Union[TriggerConfig, Dict[str, Any]]]) -> TriggerEngine:
+    # load_config вже віддає скомпільовані TriggerConfig; dict-и - для виклику з сирим config
+    triggers: List[TriggerConfig] = [
+        t if isinstance(t, TriggerConfig) else compile_trigger(t) for t in cfg_triggers
+    ]
     return TriggerEngine(triggers)
 
 
-async def run_async(config_path: str) -> None:
-    cfg = load_config(config_path)
+async def run_async(
+    config_path: str,
+    cfg: Optional[AppCfg] = None,
+    t0: Optional[float] = None,
+) -> None:
+    t0 = t0 if t0 is not None else time.perf_counter()
+    cfg = cfg or load_config(config_path)
 
     sinks = build_sinks({"sinks": cfg.sinks, "telegram": cfg.telegram})
+    book_sinks = [s for s in sinks if s.wants_books]
+    for s in sinks:
+        await s.start()
     engine = build_trigger_engine(cfg.triggers)
 
-    ws_opts = BinanceWSOptions(
-        ws_url=cfg.binance.ws_url,
-        pairs=cfg.pairs,
-        depth_stream=cfg.binance.depth_stream,
-    )
-    ws = BinanceWSClient(ws_opts)
+    venue_pairs = group_pairs_by_venue(cfg.pairs)
+    pinned_binance = list(venue_pairs.get("binance", []))
 
-    async def handle_depth(ev: Dict[str, Any]) -> None:
-        ob = parse_depth_event(ev, top_n=cfg.binance.top_n)
-        if not ob:
-            return
+    if cfg.universe.enabled:
+        from app.exchanges.binance.universe import resolve_universe
 
-        mp = calc_imbalance_ratio(ob, volume_mode=cfg.metrics.volume_mode)
+        try:
+            venue_pairs["binance"] = await resolve_universe(cfg.universe, pinned_binance)
+        except Exception as e:
+            logger.warning("Universe discovery failed -> fallback to cfg.pairs: {}", e)
+
+    adapters: Dict[str, ExchangeAdapter] = {v: build_adapter(v, cfg) for v in venue_pairs}
+    clients = {v: adapters[v].create_client(p) for v, p in venue_pairs.items()}
+
+    consolidated = None
+    if cfg.consolidated.enabled:
+        consolidated = ConsolidatedBook(
+            top_n=cfg.consolidated.top_n,
+            min_venues=cfg.consolidated.min_venues,
+            max_age_sec=cfg.consolidated.max_age_sec,
+            symbol_map=cfg.consolidated.symbol_map,
+            clip_common_depth=cfg.consolidated.clip_common_depth,
+            # liveness по з'єднанню біржі (будь-який фрейм/heartbeat), а не по зміні стакану
+            last_seen=lambda v: clients[v].last_recv_ns if v in clients else 0,
+        )
+
+    first_metric_pending = True
+
+    def log_first_metric() -> None:
+        nonlocal first_metric_pending
+        first_metric_pending = False
+
+        ms = (time.perf_counter() - t0) * 1000
+        target = cfg.runtime.startup_target_ms
+        if target > 0 and ms > target:
+            logger.warning("Startup | import -> first metric {:.1f} ms > target {:.0f} ms", ms, target)
+        else:
+            logger.info("Startup | import -> first metric {:.1f} ms", ms)
+
+    async def publish(mp: MetricPoint) -> None:
+        if first_metric_pending:
+            log_first_metric()
 
         for s in sinks:
             await s.on_metric(mp)
 
-        events = engine.process(mp)
+        await dispatch(engine.process(mp))
+
+    # exchange -> alert: wall clock проти event time біржі (є лише там, де біржа його віддає);
+    # recv -> alert: чистий внутрішній час pipeline по monotonic
+    lat_exchange = clock.LatencyStats()
+    lat_recv = clock.LatencyStats()
+
+    correlator = None
+    if cfg.correlation.enabled:
+        correlator = AlertCorrelator(
+            window_sec=cfg.correlation.window_sec,
+            bucket_sec=cfg.correlation.bucket_sec,
+            min_pairs=cfg.correlation.min_pairs,
+            top_pairs=cfg.correlation.top_pairs,
+        )
+
+    async def dispatch(events: List[TriggerEvent]) -> None:
+        if correlator is not None and events:
+            events = [out for e in events for out in correlator.process(e)]
+        await send(events)
+
+    async def send(events: List[TriggerEvent]) -> None:
         for e in events:
+            if e.exchange_ns is not None:
+                lat_exchange.add(time.time_ns() - e.exchange_ns)
+            lat_recv.add(clock.now_ns() - e.ts_ns)
             for s in sinks:
                 await s.on_trigger(e)
 
+    flow = None
+    if cfg.flow.enabled:
+        flow = FlowTracker(
+            window_sec=cfg.flow.window_sec,
+            bucket_sec=cfg.flow.bucket_sec,
+            publish_ms=cfg.flow.publish_ms,
+            volume_mode=cfg.metrics.volume_mode,
+        )
+
+    async def handle_trade(ev: Dict[str, Any]) -> None:
+        # hot path: тільки потрібні поля, без OrderBook/Level
+        try:
+            price = float(ev["p"])
+            qty = float(ev["q"])
+            ts_ms = int(ev["T"])
+        except (KeyError, TypeError, ValueError):
+            return
+
+        mp = flow.on_trade(ev.get("_pair") or "", ts_ms, price, qty, bool(ev.get("m")), ev.get("_recv_ns"))
+        if mp is not None:
+            await publish(mp)
+
+    dedup = BookChangeCache() if cfg.metrics.skip_unchanged else None
+    last_metric: Dict[str, MetricPoint] = {}  # "venue|PAIR" -> остання метрика (для unchanged)
+
+    async def handle_unchanged(key: str, recv_ns: Optional[int]) -> None:
+        if not engine.unchanged_triggers:
+            return
+        mp = last_metric.get(key)
+        if mp is not None:
+            # exchange_ns кешованої метрики належить старому фрейму -> не рахуємо його в latency
+            mp = replace(mp, ts_ns=recv_ns or clock.now_ns(), exchange_ns=None)
+            await dispatch(engine.process(mp, unchanged=True))
+
+    async def handle_depth(ev: Dict[str, Any]) -> None:
+        venue = ev.get("_venue") or DEFAULT_VENUE
+        adapter = adapters.get(venue)
+        if adapter is None:
+            return
+
+        # short-circuit до float-парсингу, якщо top-N не змінився
+        key = None
+        if dedup is not None:
+            rb = adapter.raw_book(ev)
+            if rb is not None:
+                key = f"{venue}|{rb[0]}"
+                if dedup.is_unchanged(key, rb[1], rb[2], rb[3]):
+                    # пропускаємо лише parse/metric; час стакану в consolidated/shm оновлюємо
+                    recv_ns = ev.get("_recv_ns") or clock.now_ns()
+                    pair = rb[0].upper()
+                    if consolidated is not None:
+                        consolidated.touch(venue, pair, recv_ns)
+                    for s in book_sinks:
+                        await s.on_book_unchanged(pair, recv_ns)
+                    await handle_unchanged(key, recv_ns)
+                    return
+
+        ob = adapter.parse_depth(ev)
+        if not ob or not adapter.check_sequence(ob):
+            return
+
+        for s in book_sinks:
+            await s.on_book(ob)
+
+        mp = calc_imbalance_ratio(ob, volume_mode=cfg.metrics.volume_mode)
+        if key is not None:
+            last_metric[key] = mp
+        await publish(mp)
+
+        if flow is not None:
+            ofi = flow.on_book(ob)
+            if ofi is not None:
+                await publish(ofi)
+
+        if consolidated is not None:
+            agg = consolidated.update(venue, ob)
+            if agg is not None:
+                await publish(
+                    calc_imbalance_ratio(
+                        agg,
+                        volume_mode=cfg.metrics.volume_mode,
+                        metric_name=cfg.consolidated.metric_name,
+                    )
+                )
+
+    stream_filter = (
+        only_depth_and_trade_streams(cfg.binance.trade_stream) if flow is not None else only_depth_streams
+    )
+    middlewares = [drop_subscribe_acks, stream_filter]
+    close_recorder = None
+    if cfg.record.enabled:
+        record, close_recorder = create_recorder(cfg.record.path)
+        middlewares.append(record)
+
     gateway = create_gateway(
-        middlewares=[drop_subscribe_acks, only_depth_streams],
+        middlewares=middlewares,
         on_depth=[handle_depth],
+        on_trade=[handle_trade] if flow is not None else None,
         queue_max=5000,
     )
 
     task_gateway = asyncio.create_task(gateway.run())
 
-    logger.info("Runner started | pairs={} | stream={}", cfg.pairs, cfg.binance.depth_stream)
+    stop_universe = asyncio.Event()
+    task_universe = None
+    if cfg.universe.enabled and "binance" in clients:
+        from app.exchanges.binance.universe import run_universe_refresh
 
-    try:
-        async for raw in ws.messages():
+        async def on_pairs_removed(pairs: List[str]) -> None:
+            # пара може повернутись у universe: перший snapshot після цього - завжди "changed"
+            for p in pairs:
+                key = f"binance|{p}"
+                last_metric.pop(key, None)
+                if dedup is not None:
+                    dedup.forget(key)
+                if flow is not None:
+                    flow.forget(p)
+            for s in sinks:
+                await s.on_pairs_removed(pairs)
+
+        task_universe = asyncio.create_task(
+            run_universe_refresh(
+                clients["binance"], cfg.universe, pinned_binance, stop_universe, on_removed=on_pairs_removed
+            )
+        )
+
+    # кожна біржа - окремий reader, всі пишуть в спільний gateway;
+    # recv_ns ставиться тут, до черги - latency включає і очікування в gateway
+    async def pump(client: Any) -> None:
+        async for raw in client.messages():
+            raw["_recv_ns"] = clock.now_ns()
             await gateway.push(raw)
+
+    readers = [asyncio.create_task(pump(c)) for c in clients.values()]
+
+    async def log_stats(every_sec: float = 60.0) -> None:
+        while True:
+            await asyncio.sleep(every_sec)
+            clock.resync()
+            if dedup is not None:
+                logger.info("Skip-unchanged | {}", dedup.stats())
+            if correlator is not None:
+                logger.info("Correlation | {}", correlator.stats())
+            log_latency()
+
+    def log_latency() -> None:
+        ex = lat_exchange.summary()
+        rc = lat_recv.summary()
+        if rc is not None:
+            logger.info("Alert latency | exchange->alert {} | recv->alert {}", ex or "n/a", rc)
+
+    task_stats = asyncio.create_task(log_stats())
+
+    # агрегати storm-ів віддаються по таймеру, навіть якщо нових подій немає
+    async def flush_correlation() -> None:
+        while True:
+            await asyncio.sleep(cfg.correlation.bucket_sec)
+            await send(correlator.flush())
+
+    task_correlation = asyncio.create_task(flush_correlation()) if correlator is not None else None
+
+    logger.info(
+        "Runner started | venues={} | runtime={} | import -> ready {:.1f} ms",
+        {v: len(c.pairs) for v, c in clients.items()},
+        cfg.runtime.mode,
+        (time.perf_counter() - t0) * 1000,
+    )
+
+    try:
+        await asyncio.gather(*readers)
     except KeyboardInterrupt:
         logger.info("KeyboardInterrupt -> stopping...")
     finally:
-        ws.stop()
+        for c in clients.values():
+            c.stop()
+        for t in readers:
+            t.cancel()
+        task_stats.cancel()
+        if task_correlation is not None:
+            task_correlation.cancel()
+            logger.info("Correlation | {}", correlator.stats())
+        if dedup is not None:
+            logger.info("Skip-unchanged | {}", dedup.stats())
+        log_latency()
         gateway.stop()
+        stop_universe.set()
         await asyncio.sleep(0.2)
         task_gateway.cancel()
+        if task_universe is not None:
+            task_universe.cancel()
+        if close_recorder is not None:
+            close_recorder()
+        for s in sinks:
+            await s.close()
 
 
-def run(config_path: str) -> None:
-    asyncio.run(run_async(config_path))
+def run(config_path: str, t0: Optional[float] = None) -> None:
+    cfg = load_config(config_path)
+    use_uvloop = is_performance(cfg.runtime) and cfg.runtime.uvloop
+    run_event_loop(run_async(config_path, cfg, t0), use_uvloop=use_uvloop)
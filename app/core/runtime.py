@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Any, Coroutine, Dict
+
+from loguru import logger
+
+from app.core.config import RuntimeCfg
+
+# default mode = поведінка як була до runtime секції
+_WS_DEFAULT: Dict[str, Any] = {
+    "compression": "deflate",
+    "max_queue": 1000,
+    "max_size": 1 << 20,
+    "rcvbuf_bytes": 0,
+}
+
+# performance: без permessage-deflate (inflate - найдорожче на фрейм після json),
+# глибша черга фреймів і більший socket receive buffer під burst-и
+_WS_PERFORMANCE: Dict[str, Any] = {
+    "compression": "none",
+    "max_queue": 4096,
+    "max_size": 1 << 20,
+    "rcvbuf_bytes": 4 << 20,
+}
+
+
+def is_performance(rt: RuntimeCfg) -> bool:
+    return rt.mode == "performance"
+
+
+def ws_tuning(rt: RuntimeCfg) -> Dict[str, Any]:
+    """
+    RuntimeCfg -> kwargs для WSOptions (compression/deflate params/queue/read buffer).
+    Явно задані в config значення перекривають дефолти mode.
+    """
+    out = dict(_WS_PERFORMANCE if is_performance(rt) else _WS_DEFAULT)
+
+    if rt.ws_compression is not None:
+        out["compression"] = rt.ws_compression
+    if rt.ws_max_queue is not None:
+        out["max_queue"] = rt.ws_max_queue
+    if rt.ws_max_size is not None:
+        out["max_size"] = rt.ws_max_size
+    if rt.ws_rcvbuf_bytes is not None:
+        out["rcvbuf_bytes"] = rt.ws_rcvbuf_bytes
+
+    out["deflate_server_no_context_takeover"] = rt.ws_server_no_context_takeover
+    out["deflate_client_max_window_bits"] = rt.ws_client_max_window_bits
+    out["deflate_server_max_window_bits"] = rt.ws_server_max_window_bits
+    return out
+
+
+def run_event_loop(coro: Coroutine[Any, Any, None], *, use_uvloop: bool) -> None:
+    if use_uvloop:
+        try:
+            import uvloop
+        except ImportError:
+            logger.warning("uvloop is not installed -> default asyncio loop")
+        else:
+            logger.info("Event loop: uvloop {}", getattr(uvloop, "__version__", ""))
+            if hasattr(uvloop, "run"):
+                uvloop.run(coro)
+                return
+            uvloop.install()
+
+    asyncio.run(coro)
@@ -0,0 +1,515 @@
+"""
+Фіксований layout таблиці в shared memory (little-endian):
+
+  header (HEADER_SIZE байт):
+    magic "IMBT" | version u32 | max_rows u32 | top_n u32 | n_metrics u32 | row_size u32 | rows_used u32
+    owner_pid u32 | index_gen u32  - pid writer-а; index_gen++ при звільненні/перевикористанні рядка
+    metric names: MAX_METRICS x 32 байти (utf-8, \\0-padded)
+
+  row (row_size байт, вирівняно до 64):
+    seq u64                       - seqlock: непарний = запис в процесі
+    pair 24s
+    book_ts_ns i64 | n_bids u32 | n_asks u32    - ts_ns тут і в метриках: epoch ns часу прийому
+    bids: top_n x (price f64, qty f64)
+    asks: top_n x (price f64, qty f64)
+    metrics: n_metrics x (value f64, bid_volume f64, ask_volume f64, ts_ns i64)
+
+Один writer (tracker), будь-яка кількість reader-ів в інших процесах без локів:
+reader читає seq, розпаковує значення прямо з буфера (struct.unpack_from, без проміжної копії),
+перечитує seq і повторює, якщо він змінився або був непарним.
+Рядок пари, від якої відписались, звільняється (pair = "") і перевикористовується;
+reader перебудовує індекс при зміні index_gen і звіряє pair рядка при кожному читанні.
+"""
+
+from __future__ import annotations
+
+import os
+import struct
+import time
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from loguru import logger
+
+from app.core.clock import mono_to_wall_ns
+from app.core.models import MetricPoint, OrderBook
+
+MAGIC = b"IMBT"
+VERSION = 2
+MAX_METRICS = 8
+NAME_SIZE = 32
+PAIR_SIZE = 24
+
+_HDR = struct.Struct("<4s8I")
+_HDR_ROWS_USED = 6
+_HDR_GEN = 8
+_GEN = struct.Struct("<I")
+_GEN_OFF = _HDR.size - _GEN.size   # index_gen - останнє поле header-а
+HEADER_SIZE = 64 + MAX_METRICS * NAME_SIZE
+
+_SEQ = struct.Struct("<Q")
+_ROW_HEAD = struct.Struct(f"<Q{PAIR_SIZE}sqII")   # seq, pair, book_ts_ns, n_bids, n_asks
+_ROW_BODY_HEAD = struct.Struct(f"<{PAIR_SIZE}sqII")
+_PAIR = struct.Struct(f"<{PAIR_SIZE}s")
+_LEVEL = struct.Struct("<dd")
+_METRIC = struct.Struct("<dddq")
+
+
+def _row_size(top_n: int, n_metrics: int) -> int:
+    raw = _ROW_HEAD.size + 2 * top_n * _LEVEL.size + n_metrics * _METRIC.size
+    return (raw + 63) // 64 * 64
+
+
+def table_size(max_rows: int, top_n: int, n_metrics: int) -> int:
+    return HEADER_SIZE + max_rows * _row_size(top_n, n_metrics)
+
+
+@dataclass(frozen=True)
+class MetricSlot:
+    value: float
+    bid_volume: float
+    ask_volume: float
+    ts_ns: int
+
+
+@dataclass(frozen=True)
+class RowSnapshot:
+    pair: str
+    book_ts_ns: int
+    bids: List[Tuple[float, float]]
+    asks: List[Tuple[float, float]]
+    metrics: Dict[str, MetricSlot]
+
+
+class _Layout:
+    def __init__(self, top_n: int, metrics: Sequence[str]):
+        self.top_n = top_n
+        self.metrics = list(metrics)
+        self.metric_idx = {m: i for i, m in enumerate(self.metrics)}
+        self.row_size = _row_size(top_n, len(self.metrics))
+        self.bids_off = _ROW_HEAD.size
+        self.asks_off = self.bids_off + top_n * _LEVEL.size
+        self.metrics_off = self.asks_off + top_n * _LEVEL.size
+        # весь рядок одним unpack_from: мінімальне вікно між двома читаннями seq
+        self.row_struct = struct.Struct(
+            f"<Q{PAIR_SIZE}sqII{4 * top_n}d" + "dddq" * len(self.metrics)
+        )
+
+    def row_off(self, row: int) -> int:
+        return HEADER_SIZE + row * self.row_size
+
+
+class ShmTableWriter:
+    """
+    Публікує останній top-N стакан і останні значення метрик по кожній парі.
+    Рядок під пару виділяється при першій появі пари (до max_rows), release(pair) - звільняє.
+
+    Ім'я сегмента - на один writer: якщо сегмент з таким ім'ям вже має живого власника
+    (інший tracker/shard), кидаємо FileExistsError замість перехоплення його таблиці.
+    Сегмент перевикористовується лише якщо pid власника з header-а вже не існує.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        max_rows: int = 512,
+        top_n: int = 10,
+        metrics: Sequence[str] = ("imbalance_ratio",),
+    ):
+        if len(metrics) > MAX_METRICS:
+            raise ValueError(f"Too many metrics for shm table: {len(metrics)} > {MAX_METRICS}")
+
+        self.name = name
+        self.max_rows = max_rows
+        self.layout = _Layout(top_n, metrics)
+        size = table_size(max_rows, top_n, len(self.layout.metrics))
+
+        try:
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            _reclaim_orphan(name)
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+
+        self.buf = self.shm.buf
+        self._rows: Dict[str, int] = {}
+        self._free: List[int] = []
+        self._rows_used = 0
+        self._gen = 0
+        self.dropped_pairs = 0
+
+        self.buf[:size] = bytes(size)
+        for i, m in enumerate(self.layout.metrics):
+            off = 64 + i * NAME_SIZE
+            self.buf[off : off + NAME_SIZE] = m.encode()[:NAME_SIZE].ljust(NAME_SIZE, b"\0")
+        self._write_header()
+
+    def _write_header(self) -> None:
+        lay = self.layout
+        _HDR.pack_into(
+            self.buf,
+            0,
+            MAGIC,
+            VERSION,
+            self.max_rows,
+            lay.top_n,
+            len(lay.metrics),
+            lay.row_size,
+            self._rows_used,
+            os.getpid(),
+            self._gen,
+        )
+
+    def _row(self, pair: str) -> Optional[int]:
+        row = self._rows.get(pair)
+        if row is not None:
+            return row
+
+        if self._free:
+            row = self._free.pop()
+            off = self.layout.row_off(row)
+            # рядок вже видимий reader-ам (під іншою парою) -> переписуємо під seqlock
+            seq = self._begin(off)
+            try:
+                self._clear_row(off, pair)
+            finally:
+                self._end(off, seq)
+            self._rows[pair] = row
+            self._gen += 1
+            self._write_header()
+            return row
+
+        row = self._rows_used
+        if row >= self.max_rows:
+            if not self.dropped_pairs:
+                logger.warning(
+                    "Shared memory table '{}' is full ({} rows) -> new pairs are not published (first: {})",
+                    self.name,
+                    self.max_rows,
+                    pair,
+                )
+            self.dropped_pairs += 1
+            return None
+
+        off = self.layout.row_off(row)
+        _ROW_HEAD.pack_into(self.buf, off, 0, pair.encode()[:PAIR_SIZE], 0, 0, 0)
+        self._rows[pair] = row
+        self._rows_used += 1
+        # rows_used оновлюємо після ініціалізації рядка - reader не побачить напівготовий рядок
+        self._write_header()
+        return row
+
+    def _clear_row(self, off: int, pair: str) -> None:
+        lay = self.layout
+        # seq не чіпаємо - виклик під seqlock
+        _ROW_BODY_HEAD.pack_into(self.buf, off + _SEQ.size, pair.encode()[:PAIR_SIZE], 0, 0, 0)
+        end = off + lay.row_size
+        self.buf[off + lay.bids_off : end] = bytes(end - off - lay.bids_off)
+
+    def release(self, pair: str) -> None:
+        # пара більше не торгується/відписана -> рядок у free list (pair = "" для reader-ів)
+        row = self._rows.pop(pair, None)
+        if row is None:
+            return
+        off = self.layout.row_off(row)
+        seq = self._begin(off)
+        try:
+            self._clear_row(off, "")
+        finally:
+            self._end(off, seq)
+        self._free.append(row)
+        self._gen += 1
+        self._write_header()
+
+    def _begin(self, off: int) -> int:
+        seq = _SEQ.unpack_from(self.buf, off)[0] + 1
+        _SEQ.pack_into(self.buf, off, seq)
+        return seq
+
+    def _end(self, off: int, seq: int) -> None:
+        _SEQ.pack_into(self.buf, off, seq + 1)
+
+    def write_book(self, ob: OrderBook, ts_ns: Optional[int] = None) -> None:
+        row = self._row(ob.pair)
+        if row is None:
+            return
+
+        lay = self.layout
+        off = lay.row_off(row)
+        bids = ob.bids[: lay.top_n]
+        asks = ob.asks[: lay.top_n]
+
+        seq = self._begin(off)
+        try:
+            struct.pack_into(
+                "<qII",
+                self.buf,
+                off + _SEQ.size + PAIR_SIZE,
+                ts_ns if ts_ns is not None else mono_to_wall_ns(ob.recv_ns) if ob.recv_ns else time.time_ns(),
+                len(bids),
+                len(asks),
+            )
+            p = off + lay.bids_off
+            for l in bids:
+                _LEVEL.pack_into(self.buf, p, l.price, l.qty)
+                p += _LEVEL.size
+            p = off + lay.asks_off
+            for l in asks:
+                _LEVEL.pack_into(self.buf, p, l.price, l.qty)
+                p += _LEVEL.size
+        finally:
+            self._end(off, seq)
+
+    def touch_book(self, pair: str, ts_ns: int) -> None:
+        # незмінений snapshot (skip_unchanged): стакан той самий, оновлюємо лише book_ts_ns
+        row = self._rows.get(pair)
+        if row is None:
+            return
+
+        off = self.layout.row_off(row)
+        seq = self._begin(off)
+        try:
+            struct.pack_into("<q", self.buf, off + _SEQ.size + PAIR_SIZE, ts_ns)
+        finally:
+            self._end(off, seq)
+
+    def write_metric(self, mp: MetricPoint) -> None:
+        idx = self.layout.metric_idx.get(mp.name)
+        if idx is None:
+            return
+        row = self._row(mp.pair)
+        if row is None:
+            return
+
+        off = self.layout.row_off(row)
+        ts_ns = mono_to_wall_ns(mp.ts_ns) if mp.ts_ns else time.time_ns()
+
+        seq = self._begin(off)
+        try:
+            _METRIC.pack_into(
+                self.buf,
+                off + self.layout.metrics_off + idx * _METRIC.size,
+                mp.value,
+                mp.bid_volume,
+                mp.ask_volume,
+                ts_ns,
+            )
+        finally:
+            self._end(off, seq)
+
+    def close(self, unlink: bool = True) -> None:
+        self.buf = None
+        try:
+            self.shm.close()
+            if unlink:
+                self.shm.unlink()
+        except Exception:
+            pass
+
+
+def _pid_alive(pid: int) -> bool:
+    if pid <= 0:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _reclaim_orphan(name: str) -> None:
+    # сегмент з таким ім'ям вже є: видаляємо лише таблицю, власник якої мертвий (аварійне завершення)
+    old = _attach(name)
+    try:
+        hdr = _HDR.unpack_from(old.buf, 0) if old.size >= _HDR.size else None
+    finally:
+        old.close()
+
+    if hdr is None or hdr[0] != MAGIC or hdr[1] != VERSION:
+        raise FileExistsError(f"Shared memory '{name}' exists and is not an imbalance table of this version")
+
+    pid = hdr[7]
+    if _pid_alive(pid) and pid != os.getpid():
+        raise FileExistsError(
+            f"Shared memory table '{name}' is owned by a running process (pid={pid}); "
+            f"use a different sink name per tracker/shard"
+        )
+
+    logger.warning("Reclaiming orphaned shared memory table '{}' (owner pid={} is gone)", name, pid)
+    old = shared_memory.SharedMemory(name=name)
+    old.close()
+    old.unlink()
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    # reader не повинен видаляти сегмент при виході (resource_tracker до 3.13 робить це для всіх)
+    try:
+        return shared_memory.SharedMemory(name=name, create=False, track=False)
+    except TypeError:
+        shm = shared_memory.SharedMemory(name=name, create=False)
+        try:
+            from multiprocessing import resource_tracker
+
+            resource_tracker.unregister(shm._name, "shared_memory")
+        except Exception:
+            pass
+        return shm
+
+
+class ShmTableReader:
+    """
+    Reader для інших процесів (стратегії, дашборди):
+
+        r = ShmTableReader("imbalance_tracker")
+        r.metric("BTCUSDT", "imbalance_ratio")   # -> MetricSlot | None
+        r.snapshot("BTCUSDT")                    # -> RowSnapshot | None (стакан + всі метрики)
+    """
+
+    def __init__(self, name: str, *, spin: int = 100, timeout_sec: float = 0.1):
+        self.shm = _attach(name)
+        self.buf = self.shm.buf
+        self.spin = spin
+        self.timeout_sec = timeout_sec
+
+        magic, version, max_rows, top_n, n_metrics, row_size = _HDR.unpack_from(self.buf, 0)[:6]
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"Not an imbalance shm table (magic={magic!r}, version={version})")
+
+        names = []
+        for i in range(n_metrics):
+            off = 64 + i * NAME_SIZE
+            names.append(bytes(self.buf[off : off + NAME_SIZE]).rstrip(b"\0").decode())
+
+        self.max_rows = max_rows
+        self.layout = _Layout(top_n, names)
+        if self.layout.row_size != row_size:
+            raise ValueError("shm row layout mismatch")
+
+        self._rows: Dict[str, int] = {}
+        self._known_rows = 0
+        self._gen = 0
+
+    @property
+    def metrics(self) -> List[str]:
+        return list(self.layout.metrics)
+
+    def _refresh_index(self) -> None:
+        hdr = _HDR.unpack_from(self.buf, 0)
+        rows_used, gen = hdr[_HDR_ROWS_USED], hdr[_HDR_GEN]
+        start = self._known_rows
+        if gen != self._gen:
+            # рядки звільнялись/перевикористовувались -> повний перебір
+            self._rows.clear()
+            self._gen = gen
+            start = 0
+        for row in range(start, rows_used):
+            pair = self._row_pair(self.layout.row_off(row))
+            if pair:
+                self._rows[pair] = row
+        self._known_rows = rows_used
+
+    def _row_pair(self, off: int) -> str:
+        return _PAIR.unpack_from(self.buf, off + _SEQ.size)[0].rstrip(b"\0").decode()
+
+    def pairs(self) -> List[str]:
+        self._refresh_index()
+        return list(self._rows)
+
+    def _row_off(self, pair: str) -> Optional[int]:
+        if _GEN.unpack_from(self.buf, _GEN_OFF)[0] != self._gen:
+            self._refresh_index()
+        row = self._rows.get(pair)
+        if row is None:
+            self._refresh_index()
+            row = self._rows.get(pair)
+            if row is None:
+                return None
+        return self.layout.row_off(row)
+
+    def _retries(self, pair: str):
+        # спочатку коротко крутимось, далі віддаємо CPU (writer міг бути витіснений посеред запису)
+        for i in range(self.spin):
+            yield i
+        deadline = time.monotonic() + self.timeout_sec
+        while time.monotonic() < deadline:
+            time.sleep(0)
+            yield -1
+        raise TimeoutError(f"shm row for {pair} is being rewritten too often")
+
+    def metric(self, pair: str, name: str) -> Optional[MetricSlot]:
+        pair = pair.upper()
+        idx = self.layout.metric_idx.get(name)
+        off = self._row_off(pair)
+        if idx is None or off is None:
+            return None
+
+        moff = off + self.layout.metrics_off + idx * _METRIC.size
+        buf = self.buf
+        for _ in self._retries(pair):
+            s1 = _SEQ.unpack_from(buf, off)[0]
+            if s1 & 1:
+                continue
+            vals = _METRIC.unpack_from(buf, moff)
+            owner = _PAIR.unpack_from(buf, off + _SEQ.size)[0]
+            if _SEQ.unpack_from(buf, off)[0] == s1:
+                if owner.rstrip(b"\0").decode() != pair:
+                    # рядок звільнено / віддано іншій парі
+                    self._rows.pop(pair, None)
+                    return None
+                return MetricSlot(*vals) if vals[3] else None
+        return None
+
+    def snapshot(self, pair: str) -> Optional[RowSnapshot]:
+        pair = pair.upper()
+        off = self._row_off(pair)
+        if off is None:
+            return None
+
+        lay = self.layout
+        buf = self.buf
+        for _ in self._retries(pair):
+            s1 = _SEQ.unpack_from(buf, off)[0]
+            if s1 & 1:
+                continue
+
+            vals = lay.row_struct.unpack_from(buf, off)
+            if vals[0] != s1 or _SEQ.unpack_from(buf, off)[0] != s1:
+                continue
+
+            if vals[1].rstrip(b"\0").decode() != pair:
+                self._rows.pop(pair, None)
+                return None
+
+            book_ts, nb, na = vals[2], min(vals[3], lay.top_n), min(vals[4], lay.top_n)
+            levels = vals[5 : 5 + 4 * lay.top_n]
+            bids = [(levels[2 * i], levels[2 * i + 1]) for i in range(nb)]
+            a0 = 2 * lay.top_n
+            asks = [(levels[a0 + 2 * i], levels[a0 + 2 * i + 1]) for i in range(na)]
+
+            m0 = 5 + 4 * lay.top_n
+            metrics: Dict[str, MetricSlot] = {}
+            for i, m in enumerate(lay.metrics):
+                v = vals[m0 + 4 * i : m0 + 4 * i + 4]
+                if v[3]:
+                    metrics[m] = MetricSlot(*v)
+
+            return RowSnapshot(pair=pair, book_ts_ns=book_ts, bids=bids, asks=asks, metrics=metrics)
+        return None
+
+    def snapshot_all(self) -> Dict[str, RowSnapshot]:
+        out: Dict[str, RowSnapshot] = {}
+        for p in self.pairs():
+            snap = self.snapshot(p)
+            if snap is not None:
+                out[p] = snap
+        return out
+
+    def close(self) -> None:
+        self.buf = None
+        try:
+            self.shm.close()
+        except Exception:
+            pass
@@ -1,16 +1,35 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import Any, List
+from dataclasses import dataclass, field
+from typing import Any, List, Optional
 
 from loguru import logger
 
-from app.core.models import MetricPoint, TriggerEvent
-from app.notify.telegram.messages import build_trigger_message
-from app.notify.telegram.sender import send_telegram_message
+from app.core.clock import mono_to_wall_ns
+from app.core.models import MetricPoint, OrderBook, TriggerEvent
 
 
 class Sink:
+    # True -> runner викликає on_book з кожним розпарсеним стаканом
+    wants_books = False
+
+    async def start(self) -> None:
+        return
+
+    async def close(self) -> None:
+        return
+
+    async def on_book(self, ob: OrderBook) -> None:
+        return
+
+    async def on_book_unchanged(self, pair: str, recv_ns: int) -> None:
+        # top-N не змінився (skip_unchanged): стакан з останнього on_book актуальний на recv_ns
+        return
+
+    async def on_pairs_removed(self, pairs: List[str]) -> None:
+        # відписка (universe refresh): пари більше не оновлюються
+        return
+
     async def on_metric(self, mp: MetricPoint) -> None:
         return
 
@@ -47,12 +66,80 @@ class TelegramSink(Sink):
     chat_id: str
     enabled: bool = True
 
+    def __post_init__(self) -> None:
+        self._build: Optional[Any] = None
+        self._send: Optional[Any] = None
+
+    async def start(self) -> None:
+        # aiohttp - найважчий імпорт (~сотні ms): sink будується лише з увімкненим Telegram,
+        # тож імпортуємо тут, на старті, а не на event loop посеред першого алерту
+        from app.notify.telegram.messages import build_trigger_message
+        from app.notify.telegram.sender import send_telegram_message
+
+        self._build = build_trigger_message
+        self._send = send_telegram_message
+
     async def on_trigger(self, ev: TriggerEvent) -> None:
         if not self.enabled:
             return
+        if self._send is None:
+            await self.start()
+
+        text = self._build(ev)
+        await self._send(self.bot_token, self.chat_id, text)
+
+
+@dataclass
+class SharedMemorySink(Sink):
+    """
+    Останній top-N стакан + значення метрик по кожній парі у shared memory таблиці
+    (див. app.core.shm, reader: ShmTableReader).
+    """
 
-        text = build_trigger_message(ev)
-        await send_telegram_message(self.bot_token, self.chat_id, text)
+    name: str = "imbalance_tracker"
+    max_rows: int = 512
+    top_n: int = 10
+    metrics: List[str] = field(default_factory=lambda: ["imbalance_ratio"])
+
+    wants_books = True
+
+    def __post_init__(self) -> None:
+        self._writer: Optional[Any] = None
+
+    async def start(self) -> None:
+        from app.core.shm import ShmTableWriter
+
+        self._writer = ShmTableWriter(
+            self.name,
+            max_rows=self.max_rows,
+            top_n=self.top_n,
+            metrics=self.metrics,
+        )
+        logger.info("Shared memory table '{}' | rows={} | metrics={}", self.name, self.max_rows, self.metrics)
+
+    async def close(self) -> None:
+        if self._writer is not None:
+            if self._writer.dropped_pairs:
+                logger.warning("Shared memory table full: {} pair writes dropped", self._writer.dropped_pairs)
+            self._writer.close()
+            self._writer = None
+
+    async def on_book(self, ob: OrderBook) -> None:
+        if self._writer is not None:
+            self._writer.write_book(ob)
+
+    async def on_book_unchanged(self, pair: str, recv_ns: int) -> None:
+        if self._writer is not None:
+            self._writer.touch_book(pair, mono_to_wall_ns(recv_ns))
+
+    async def on_pairs_removed(self, pairs: List[str]) -> None:
+        if self._writer is not None:
+            for p in pairs:
+                self._writer.release(p)
+
+    async def on_metric(self, mp: MetricPoint) -> None:
+        if self._writer is not None:
+            self._writer.write_metric(mp)
 
 
 def _read_telegram_cfg(tg: Any) -> tuple[bool, str, str]:
@@ -92,6 +179,27 @@ def build_sinks(cfg: dict) -> List[Sink]:
                 )
             )
 
+        elif st == "shm":
+            sinks.append(
+                SharedMemorySink(
+                    name=str(s.get("name", "imbalance_tracker")),
+                    max_rows=int(s.get("max_rows", 512)),
+                    top_n=int(s.get("top_n", 10)),
+                    metrics=[str(m) for m in (s.get("metrics") or ["imbalance_ratio"])],
+                )
+            )
+
+        elif st == "stream":
+            from app.core.stream_server import StreamServerSink
+
+            sinks.append(
+                StreamServerSink(
+                    host=str(s.get("host", "127.0.0.1")),
+                    port=int(s.get("port", 8765)),
+                    max_pending_triggers=int(s.get("max_pending_triggers", 1000)),
+                )
+            )
+
     tg_enabled, tg_token, tg_chat_id = _read_telegram_cfg(cfg.get("telegram"))
 
     if tg_enabled and tg_token and tg_chat_id:
@@ -0,0 +1,221 @@
+"""
+Протокол (JSON поверх WebSocket):
+
+  client -> server:
+    {"op": "subscribe", "pairs": ["BTCUSDT", ...] | ["*"], "metrics": true, "triggers": true}
+    {"op": "unsubscribe", "pairs": [...]}
+
+  server -> client (ts - ISO UTC часу прийому; exchange_ts_ns - event time біржі або null):
+    {"type": "metric", "pair": ..., "name": ..., "value": ..., "bid_volume": ..., "ask_volume": ..., "ts": ..., "exchange_ts_ns": ...}
+    {"type": "trigger", "pair": ..., "trigger_name": ..., "metric": ..., "metric_value": ..., ..., "group_size": 1, "pairs": [], "group_pairs": [], "already_sent": 0, "message": ...}
+    агреговане сповіщення (correlation): pair = "N pairs", group_size = N, pairs = [[pair, value], ...] (top),
+    group_pairs = усі N пар (already_sent з них вже приходили окремими trigger-ами);
+    приходить кожному, хто підписаний хоча б на одну з них
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Deque, Dict, FrozenSet, Optional, Set, Tuple
+
+from loguru import logger
+
+from app.core.models import MetricPoint, TriggerEvent
+from app.core.sinks import Sink
+
+ALL = "*"
+
+
+def encode_metric(mp: MetricPoint) -> str:
+    return json.dumps(
+        {
+            "type": "metric",
+            "pair": mp.pair,
+            "name": mp.name,
+            "value": mp.value,
+            "bid_volume": mp.bid_volume,
+            "ask_volume": mp.ask_volume,
+            "ts": mp.ts.isoformat(),
+            "exchange_ts_ns": mp.exchange_ns,
+        },
+        separators=(",", ":"),
+    )
+
+
+def encode_trigger(ev: TriggerEvent) -> str:
+    return json.dumps(
+        {
+            "type": "trigger",
+            "pair": ev.pair,
+            "trigger_name": ev.trigger_name,
+            "metric": ev.metric,
+            "metric_value": ev.metric_value,
+            "bid_volume": ev.bid_volume,
+            "ask_volume": ev.ask_volume,
+            "ts": ev.ts.isoformat(),
+            "exchange_ts_ns": ev.exchange_ns,
+            "group_size": ev.group_size,
+            "pairs": [list(p) for p in ev.pairs],
+            "group_pairs": sorted(ev.group_pairs),
+            "already_sent": ev.already_sent,
+            "message": ev.message,
+        },
+        separators=(",", ":"),
+    )
+
+
+class _Client:
+    """
+    Власний буфер на клієнта:
+      - метрики: conflation latest-value per (pair, metric) - повільний клієнт отримує найсвіжіше, а не чергу
+      - тригери: bounded deque (події не зливаємо, але й не ростемо без меж)
+    """
+
+    __slots__ = ("ws", "pairs", "metrics", "triggers", "latest", "pending_triggers", "wake", "dropped", "task")
+
+    def __init__(self, ws: Any, max_pending_triggers: int):
+        self.ws = ws
+        self.pairs: Set[str] = set()
+        self.metrics = True
+        self.triggers = True
+        self.latest: Dict[Tuple[str, str], str] = {}
+        self.pending_triggers: Deque[str] = deque(maxlen=max_pending_triggers)
+        self.wake = asyncio.Event()
+        self.dropped = 0
+        self.task: Optional[asyncio.Task] = None
+
+    def wants(self, pair: str) -> bool:
+        return ALL in self.pairs or pair in self.pairs
+
+    def wants_any(self, pairs: FrozenSet[str]) -> bool:
+        return bool(pairs) and (ALL in self.pairs or not self.pairs.isdisjoint(pairs))
+
+    def offer_metric(self, key: Tuple[str, str], payload: str) -> None:
+        self.latest[key] = payload
+        self.wake.set()
+
+    def offer_trigger(self, payload: str) -> None:
+        if len(self.pending_triggers) == self.pending_triggers.maxlen:
+            self.dropped += 1
+        self.pending_triggers.append(payload)
+        self.wake.set()
+
+    async def sender(self) -> None:
+        from websockets.exceptions import ConnectionClosed
+
+        try:
+            while True:
+                await self.wake.wait()
+                self.wake.clear()
+
+                # тригери першими - вони важливіші за проміжні значення метрик
+                while self.pending_triggers:
+                    await self.ws.send(self.pending_triggers.popleft())
+
+                batch, self.latest = self.latest, {}
+                for payload in batch.values():
+                    await self.ws.send(payload)
+        except ConnectionClosed:
+            # клієнт пішов між wake і send - _handle сам прибере його з _clients
+            return
+
+
+@dataclass
+class StreamServerSink(Sink):
+    """
+    Локальний WebSocket сервер для підписників на метрики/тригери.
+    Pipeline ніколи не чекає на клієнтів: on_metric/on_trigger тільки кладуть вже закодоване
+    повідомлення (одне на tick, спільне для всіх підписників) у буфер клієнта і будять його sender.
+    """
+
+    host: str = "127.0.0.1"
+    port: int = 8765
+    max_pending_triggers: int = 1000
+
+    def __post_init__(self) -> None:
+        self._server: Optional[Any] = None
+        self._clients: Set[_Client] = set()
+
+    async def start(self) -> None:
+        import websockets
+
+        self._server = await websockets.serve(self._handle, self.host, self.port)
+        logger.info("Stream server listening on ws://{}:{}", self.host, self.port)
+
+    async def close(self) -> None:
+        for c in list(self._clients):
+            if c.task is not None:
+                c.task.cancel()
+        self._clients.clear()
+
+        if self._server is not None:
+            self._server.close()
+            try:
+                await self._server.wait_closed()
+            except Exception:
+                pass
+            self._server = None
+
+    def _apply(self, c: _Client, msg: Dict[str, Any]) -> None:
+        op = str(msg.get("op") or "").lower()
+        pairs = {str(p).upper() for p in (msg.get("pairs") or [])}
+
+        if op == "subscribe":
+            c.pairs |= pairs or {ALL}
+            c.metrics = bool(msg.get("metrics", c.metrics))
+            c.triggers = bool(msg.get("triggers", c.triggers))
+        elif op == "unsubscribe":
+            c.pairs -= pairs or set(c.pairs)
+
+    async def _handle(self, ws: Any) -> None:
+        c = _Client(ws, self.max_pending_triggers)
+        c.task = asyncio.create_task(c.sender())
+        self._clients.add(c)
+        logger.info("Stream client connected | {} | clients={}", ws.remote_address, len(self._clients))
+
+        try:
+            async for raw in ws:
+                try:
+                    msg = json.loads(raw)
+                except (TypeError, ValueError):
+                    continue
+                if isinstance(msg, dict):
+                    self._apply(c, msg)
+        except Exception as e:
+            logger.debug("Stream client error: {}", e)
+        finally:
+            self._clients.discard(c)
+            c.task.cancel()
+            logger.info(
+                "Stream client disconnected | {} | dropped_triggers={} | clients={}",
+                ws.remote_address,
+                c.dropped,
+                len(self._clients),
+            )
+
+    async def on_metric(self, mp: MetricPoint) -> None:
+        if not self._clients:
+            return
+
+        payload: Optional[str] = None
+        key = (mp.pair, mp.name)
+        for c in self._clients:
+            if c.metrics and c.wants(mp.pair):
+                if payload is None:
+                    payload = encode_metric(mp)
+                c.offer_metric(key, payload)
+
+    async def on_trigger(self, ev: TriggerEvent) -> None:
+        if not self._clients:
+            return
+
+        payload: Optional[str] = None
+        for c in self._clients:
+            # агрегат (group_size > 1) - кожному, хто підписаний хоча б на одну з пар групи
+            if c.triggers and (c.wants(ev.pair) or c.wants_any(ev.group_pairs)):
+                if payload is None:
+                    payload = encode_trigger(ev)
+                c.offer_trigger(payload)
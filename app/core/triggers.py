@@ -1,9 +1,9 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from datetime import datetime, timezone
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional
 
+from app.core.clock import NS_PER_SEC, now_ns
 from app.core.models import MetricPoint, TriggerEvent
 
 
@@ -15,11 +15,41 @@ class TriggerConfig:
     value: float
     cooldown_sec: float = 0.0
     emit: str = "edge"        # "edge" | "always"
+    reevaluate_unchanged: bool = True  # emit=always: перевіряти і на незмінених snapshot-ах (по кешованій метриці)
+
+
+OPS = (">=", "<=", ">", "<", "==")
+EMIT_MODES = ("edge", "always")
+
+
+def compile_trigger(t: Dict[str, Any]) -> TriggerConfig:
+    # raw dict з config -> TriggerConfig; ValueError на невалідні значення
+    name = str(t.get("name") or "").strip()
+    if not name:
+        raise ValueError(f"Trigger without name: {t}")
+
+    op = str(t.get("op", ">="))
+    if op not in OPS:
+        raise ValueError(f"Trigger '{name}': unsupported op '{op}' (expected one of {OPS})")
+
+    emit = str(t.get("emit", "edge"))
+    if emit not in EMIT_MODES:
+        raise ValueError(f"Trigger '{name}': unsupported emit '{emit}' (expected one of {EMIT_MODES})")
+
+    return TriggerConfig(
+        name=name,
+        metric=str(t.get("metric", "imbalance_ratio")),
+        op=op,
+        value=float(t.get("value", 0.0)),
+        cooldown_sec=float(t.get("cooldown_sec", 0.0)),
+        emit=emit,
+        reevaluate_unchanged=bool(t.get("reevaluate_unchanged", True)),
+    )
 
 
 @dataclass
 class _TriggerState:
-    last_emit_ts: Optional[datetime] = None
+    last_emit_ns: Optional[int] = None
     last_condition: Optional[bool] = None
 
 
@@ -44,12 +74,13 @@ def can_emit_edge(prev: Optional[bool], current: bool) -> bool:
     return (prev is False) or (prev is None)
 
 
-def cooldown_passed(last_ts: Optional[datetime], now: datetime, cooldown_sec: float) -> bool:
+def cooldown_passed(last_ns: Optional[int], now: int, cooldown_sec: float) -> bool:
+    # last_ns/now - monotonic ns (MetricPoint.ts_ns)
     if cooldown_sec <= 0:
         return True
-    if last_ts is None:
+    if last_ns is None:
         return True
-    return (now - last_ts).total_seconds() >= cooldown_sec
+    return now - last_ns >= cooldown_sec * NS_PER_SEC
 
 
 class TriggerEngine:
@@ -57,12 +88,19 @@ class TriggerEngine:
         self.triggers = triggers
         self.state: Dict[str, _TriggerState] = {}  # key = "PAIR|trigger_name"
 
-    def process(self, mp: MetricPoint) -> List[TriggerEvent]:
+        # edge-тригери на незміненому значенні ніколи не спрацюють, тож для unchanged - тільки always
+        self.unchanged_triggers = [t for t in triggers if t.emit == "always" and t.reevaluate_unchanged]
+
+    def process(self, mp: MetricPoint, *, unchanged: bool = False) -> List[TriggerEvent]:
+        """
+        unchanged=True: mp - кешована метрика незміненого стакану (з оновленим ts),
+        перевіряємо лише always-тригери з reevaluate_unchanged.
+        """
         events: List[TriggerEvent] = []
 
-        now = mp.ts or datetime.now(timezone.utc)
+        now = mp.ts_ns or now_ns()
 
-        for t in self.triggers:
+        for t in (self.unchanged_triggers if unchanged else self.triggers):
             if t.metric != mp.name:
                 continue
 
@@ -74,7 +112,7 @@ class TriggerEngine:
             cond = compare(t.op, mp.value, t.value)
 
             if cond:
-                if not cooldown_passed(st.last_emit_ts, now, t.cooldown_sec):
+                if not cooldown_passed(st.last_emit_ns, now, t.cooldown_sec):
                     st.last_condition = cond
                     self.state[key] = st
                     continue
@@ -85,7 +123,7 @@ class TriggerEngine:
                     should_emit = can_emit_edge(st.last_condition, cond)
 
                 if should_emit:
-                    st.last_emit_ts = now
+                    st.last_emit_ns = now
 
                     msg = (
                         f"{t.name}: {mp.name} {t.op} {t.value} | "
@@ -101,8 +139,9 @@ class TriggerEngine:
                             metric_value=mp.value,
                             bid_volume=mp.bid_volume,
                             ask_volume=mp.ask_volume,
-                            ts=now,
+                            ts_ns=now,
                             message=msg,
+                            exchange_ns=mp.exchange_ns,
                         )
                     )
 
@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+from typing import Any, Dict, Iterable, List, Optional, Protocol, Tuple
+
+from app.core.models import OrderBook
+
+RawMsg = Dict[str, Any]
+
+DEFAULT_VENUE = "binance"
+
+
+class ExchangeAdapter(Protocol):
+    """
+    Все, що venue-специфічне: побудова стрімів, керуючі повідомлення,
+    декодування фреймів, нормалізація стакану та перевірка послідовності.
+    raw_book: (pair, seq, bids_raw, asks_raw) для повних snapshot-ів ще до float-парсингу
+    (для diff-подій - None).
+    Опційно: heartbeat_message() -> текст app-level ping для WSOptions.heartbeat_sec (OKX: "ping");
+    seq: SequenceGuard - VenueWSClient скидає його на кожному (re)connect.
+    Решта pipeline (gateway -> metrics -> triggers -> sinks) від біржі не залежить.
+    """
+
+    name: str
+    top_n: int
+
+    def normalize_pair(self, pair: str) -> str: ...
+
+    def build_streams(self, pairs: Iterable[str]) -> List[Any]: ...
+
+    def control_message(self, action: str, streams: List[Any], req_id: int) -> RawMsg: ...
+
+    def decode(self, raw: Any) -> List[RawMsg]: ...
+
+    def raw_book(self, ev: RawMsg) -> Optional[Tuple[str, Optional[int], Any, Any]]: ...
+
+    def parse_depth(self, ev: RawMsg) -> Optional[OrderBook]: ...
+
+    def check_sequence(self, ob: OrderBook) -> bool: ...
+
+    def create_client(self, pairs: List[str]) -> Any: ...
+
+
+class SequenceGuard:
+    """
+    Відкидає застарілі snapshot-и по pair (seq < last).
+    seq == last пропускаємо: Binance depth<N> повторює той самий lastUpdateId на тихих парах,
+    а незмінні стакани відсіює dedup (metrics.skip_unchanged), а не guard.
+    Якщо поспіль приходить max_stale застарілих seq - вважаємо, що біржа скинула нумерацію, і ресинхронізуємось.
+    VenueWSClient скидає guard (reset) на кожному (re)connect.
+    """
+
+    def __init__(self, max_stale: int = 50):
+        self.max_stale = max_stale
+        self._last: Dict[str, int] = {}
+        self._stale: Dict[str, int] = {}
+        self.dropped = 0
+
+    def accept(self, pair: str, seq: Optional[int]) -> bool:
+        if seq is None:
+            return True
+
+        last = self._last.get(pair)
+        if last is None or seq > last:
+            self._last[pair] = seq
+            self._stale.pop(pair, None)
+            return True
+        if seq == last:
+            return True
+
+        n = self._stale.get(pair, 0) + 1
+        if n >= self.max_stale:
+            self._last[pair] = seq
+            self._stale.pop(pair, None)
+            return True
+
+        self._stale[pair] = n
+        self.dropped += 1
+        return False
+
+    def reset(self, pair: Optional[str] = None) -> None:
+        if pair is None:
+            self._last.clear()
+            self._stale.clear()
+            return
+        self._last.pop(pair, None)
+        self._stale.pop(pair, None)
+
+
+def split_venue_pair(entry: str, default: str = DEFAULT_VENUE) -> Tuple[str, str]:
+    # "BTCUSDT" -> ("binance", "BTCUSDT"), "okx:BTC-USDT" -> ("okx", "BTC-USDT")
+    entry = (entry or "").strip()
+    if ":" in entry:
+        venue, pair = entry.split(":", 1)
+        return venue.strip().lower(), pair.strip().upper()
+    return default, entry.upper()
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import json
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from loguru import logger
+
+from app.core.models import OrderBook
+from app.exchanges.base import RawMsg, SequenceGuard
+from app.exchanges.binance.parser import parse_depth_event
+from app.exchanges.binance.streams import build_depth_streams
+
+
+class BinanceAdapter:
+    name = "binance"
+
+    def __init__(
+        self,
+        *,
+        depth_stream: str = "depth10@100ms",
+        trade_stream: str = "",
+        top_n: int = 10,
+        ws_url: str = "",
+        ws_options: Optional[Dict[str, Any]] = None,
+    ):
+        self.depth_stream = depth_stream
+        self.trade_stream = trade_stream
+        self.top_n = top_n
+        self.ws_url = ws_url
+        self.ws_options = dict(ws_options or {})
+        self.seq = SequenceGuard()
+
+    def normalize_pair(self, pair: str) -> str:
+        return pair.strip().upper()
+
+    def build_streams(self, pairs: Iterable[str]) -> List[Any]:
+        pairs = list(pairs)
+        streams = build_depth_streams(pairs, self.depth_stream)
+        if self.trade_stream:
+            streams += build_depth_streams(pairs, self.trade_stream)
+        return streams
+
+    def control_message(self, action: str, streams: List[Any], req_id: int) -> RawMsg:
+        return {"method": action.upper(), "params": streams, "id": req_id}
+
+    def decode(self, raw: Any) -> List[RawMsg]:
+        try:
+            data = json.loads(raw)
+        except json.JSONDecodeError:
+            logger.warning("JSON decode error. Raw={}", str(raw)[:300])
+            return []
+        if not isinstance(data, dict):
+            return []
+        data["_venue"] = self.name
+        return [data]
+
+    def raw_book(self, ev: RawMsg) -> Optional[Tuple[str, Optional[int], Any, Any]]:
+        if "bids" not in ev or "asks" not in ev:
+            return None
+        seq = ev.get("lastUpdateId")
+        return ev.get("_pair") or "", seq if isinstance(seq, int) else None, ev["bids"], ev["asks"]
+
+    def parse_depth(self, ev: RawMsg) -> Optional[OrderBook]:
+        return parse_depth_event(ev, top_n=self.top_n)
+
+    def check_sequence(self, ob: OrderBook) -> bool:
+        return self.seq.accept(ob.pair, ob.last_update_id)
+
+    def create_client(self, pairs: List[str]) -> Any:
+        from app.exchanges.binance.ws import BinanceWSClient, BinanceWSOptions
+
+        return BinanceWSClient(
+            BinanceWSOptions(
+                ws_url=self.ws_url,
+                pairs=pairs,
+                depth_stream=self.depth_stream,
+                **self.ws_options,
+            ),
+            adapter=self,
+        )
@@ -2,6 +2,7 @@ from __future__ import annotations
 
 from typing import Any, Dict, Optional
 
+from app.core.clock import ms_to_ns
 from app.core.models import OrderBook
 from app.core.orderbook import build_orderbook
 
@@ -12,6 +13,10 @@ def parse_depth_event(ev: Dict[str, Any], *, top_n: int) -> Optional[OrderBook]:
     if not pair:
         return None
 
+    # partial book (spot depthN) не має "E"; diff depth / futures - має
+    exchange_ns = ms_to_ns(ev.get("E"))
+    recv_ns = ev.get("_recv_ns")
+
     if "bids" in ev and "asks" in ev:
         bids = ev.get("bids") or []
         asks = ev.get("asks") or []
@@ -23,6 +28,8 @@ def parse_depth_event(ev: Dict[str, Any], *, top_n: int) -> Optional[OrderBook]:
             asks_raw=asks,
             top_n=top_n,
             last_update_id=last_id if isinstance(last_id, int) else None,
+            exchange_ns=exchange_ns,
+            recv_ns=recv_ns,
         )
 
     if ev.get("e") == "depthUpdate":
@@ -36,6 +43,8 @@ def parse_depth_event(ev: Dict[str, Any], *, top_n: int) -> Optional[OrderBook]:
             asks_raw=asks,
             top_n=top_n,
             last_update_id=last_id if isinstance(last_id, int) else None,
+            exchange_ns=exchange_ns,
+            recv_ns=recv_ns,
         )
 
     return None
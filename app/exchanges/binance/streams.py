@@ -0,0 +1,20 @@
+from __future__ import annotations
+
+from typing import Iterable, List
+
+
+def build_depth_streams(pairs: Iterable[str], depth_stream: str) -> List[str]:
+    ds = (depth_stream or "").strip()
+    if not ds:
+        raise ValueError("depth_stream is empty (expected like 'depth10@100ms').")
+
+    out: List[str] = []
+    for p in pairs:
+        p = (p or "").strip()
+        if not p:
+            continue
+        out.append(f"{p.lower()}@{ds}")
+
+    if not out:
+        raise ValueError("No valid pairs provided.")
+    return out
@@ -0,0 +1,178 @@
+from __future__ import annotations
+
+import asyncio
+import json
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import aiohttp
+from loguru import logger
+
+from app.core.config import UniverseCfg
+from app.exchanges.binance.ws import BinanceWSClient
+
+
+def _to_float(v: Any) -> float:
+    try:
+        return float(v)
+    except Exception:
+        return 0.0
+
+
+async def fetch_rest_sources(rest_url: str) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    base = rest_url.rstrip("/")
+
+    async with aiohttp.ClientSession() as session:
+        async with session.get(f"{base}/api/v3/exchangeInfo", timeout=15) as resp:
+            resp.raise_for_status()
+            exchange_info = await resp.json()
+
+        async with session.get(f"{base}/api/v3/ticker/24hr", timeout=15) as resp:
+            resp.raise_for_status()
+            tickers = await resp.json()
+
+    return exchange_info or {}, list(tickers or [])
+
+
+def load_fixture_sources(path: str) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    # {"exchangeInfo": {...}, "tickers": [...]} - той самий формат, що віддає REST
+    with open(path, "r", encoding="utf-8") as f:
+        raw = json.load(f) or {}
+    return raw.get("exchangeInfo") or {}, list(raw.get("tickers") or [])
+
+
+async def load_sources(cfg: UniverseCfg) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    if cfg.source == "file":
+        return load_fixture_sources(cfg.fixture_path)
+    return await fetch_rest_sources(cfg.rest_url)
+
+
+def select_universe(
+    exchange_info: Dict[str, Any],
+    tickers: Iterable[Dict[str, Any]],
+    *,
+    quote_asset: str,
+    min_quote_volume: float,
+    max_pairs: int,
+    exclude: Sequence[str] = (),
+) -> List[str]:
+    """
+    Фільтр: статус TRADING + spot + потрібний quote asset + 24h quoteVolume >= min.
+    Ранжування: за quoteVolume (desc), обрізаємо до max_pairs.
+    """
+    quote = quote_asset.upper()
+    excluded = {s.upper() for s in exclude}
+
+    eligible = set()
+    for s in exchange_info.get("symbols") or []:
+        if s.get("status") != "TRADING":
+            continue
+        if s.get("isSpotTradingAllowed") is False:
+            continue
+        if str(s.get("quoteAsset", "")).upper() != quote:
+            continue
+        sym = str(s.get("symbol", "")).upper()
+        if sym and sym not in excluded:
+            eligible.add(sym)
+
+    ranked: List[Tuple[float, str]] = []
+    for t in tickers:
+        sym = str(t.get("symbol", "")).upper()
+        if sym not in eligible:
+            continue
+        qv = _to_float(t.get("quoteVolume"))
+        if qv < min_quote_volume:
+            continue
+        ranked.append((qv, sym))
+
+    ranked.sort(key=lambda x: (-x[0], x[1]))
+
+    out = [sym for _, sym in ranked]
+    if max_pairs > 0:
+        out = out[:max_pairs]
+    return out
+
+
+def merge_pinned(pinned: Iterable[str], selected: Iterable[str]) -> List[str]:
+    # пари з cfg.pairs завжди лишаються в підписці, незалежно від фільтрів
+    out: List[str] = []
+    seen = set()
+    for p in list(pinned) + list(selected):
+        p = (p or "").strip().upper()
+        if p and p not in seen:
+            seen.add(p)
+            out.append(p)
+    return out
+
+
+def diff_pairs(current: Iterable[str], target: Iterable[str]) -> Tuple[List[str], List[str]]:
+    cur = [p.upper() for p in current]
+    tgt = [p.upper() for p in target]
+    cur_set = set(cur)
+    tgt_set = set(tgt)
+
+    to_add = [p for p in tgt if p not in cur_set]
+    to_remove = [p for p in cur if p not in tgt_set]
+    return to_add, to_remove
+
+
+async def resolve_universe(cfg: UniverseCfg, pinned: Sequence[str]) -> List[str]:
+    exchange_info, tickers = await load_sources(cfg)
+    selected = select_universe(
+        exchange_info,
+        tickers,
+        quote_asset=cfg.quote_asset,
+        min_quote_volume=cfg.min_quote_volume,
+        max_pairs=cfg.max_pairs,
+        exclude=cfg.exclude,
+    )
+    return merge_pinned(pinned, selected)
+
+
+async def run_universe_refresh(
+    ws: BinanceWSClient,
+    cfg: UniverseCfg,
+    pinned: Sequence[str],
+    stop_event: Optional[asyncio.Event] = None,
+    on_removed: Optional[Callable[[List[str]], Awaitable[None]]] = None,
+) -> None:
+    """
+    Періодично перераховує universe і застосовує diff до живих підписок
+    через BinanceWSClient.update_pairs (без рестарту pipeline).
+    on_removed(pairs) - після відписки (напр. звільнити рядки shm таблиці).
+    """
+    stop_event = stop_event or asyncio.Event()
+    refresh = max(1.0, float(cfg.refresh_sec))
+    overflow = 0
+
+    while not stop_event.is_set():
+        try:
+            await asyncio.wait_for(stop_event.wait(), timeout=refresh)
+            break
+        except asyncio.TimeoutError:
+            pass
+
+        try:
+            target = await resolve_universe(cfg, pinned)
+        except Exception as e:
+            logger.warning("Universe refresh failed: {}", e)
+            continue
+
+        # понад ліміт стрімів на з'єднання пари не підписуються - не пробуємо їх щоразу знову
+        capped = ws.cap_pairs(target)
+        if len(capped) < len(target) and len(target) - len(capped) != overflow:
+            logger.warning(
+                "Universe exceeds stream limit per connection | target={} | subscribed={} | skipped={}",
+                len(target),
+                len(capped),
+                len(target) - len(capped),
+            )
+        overflow = len(target) - len(capped)
+
+        to_add, to_remove = diff_pairs(ws.pairs, capped)
+        if not to_add and not to_remove:
+            continue
+
+        logger.info("Universe diff | +{} -{} | total={}", len(to_add), len(to_remove), len(capped))
+        await ws.update_pairs(add=to_add, remove=to_remove)
+        if to_remove and on_removed is not None:
+            await on_removed(to_remove)
@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import json
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from loguru import logger
+
+from app.core.models import OrderBook
+from app.exchanges.base import RawMsg, SequenceGuard
+from app.exchanges.okx.parser import parse_books_event, split_books_message, to_inst_id
+
+
+class OKXAdapter:
+    name = "okx"
+
+    def __init__(
+        self,
+        *,
+        depth_stream: str = "books5",
+        top_n: int = 5,
+        ws_url: str = "",
+        ws_options: Optional[Dict[str, Any]] = None,
+    ):
+        self.depth_stream = depth_stream
+        self.top_n = top_n
+        self.ws_url = ws_url
+        self.ws_options = dict(ws_options or {})
+        self.seq = SequenceGuard()
+
+    def normalize_pair(self, pair: str) -> str:
+        return to_inst_id(pair)
+
+    def build_streams(self, pairs: Iterable[str]) -> List[Any]:
+        out: List[Any] = []
+        for p in pairs:
+            inst = to_inst_id(p)
+            if inst:
+                out.append({"channel": self.depth_stream, "instId": inst})
+        if not out:
+            raise ValueError("No valid pairs provided.")
+        return out
+
+    def control_message(self, action: str, streams: List[Any], req_id: int) -> RawMsg:
+        return {"id": str(req_id), "op": action.lower(), "args": streams}
+
+    def heartbeat_message(self) -> str:
+        return "ping"
+
+    def decode(self, raw: Any) -> List[RawMsg]:
+        if raw == "pong":
+            return []
+        try:
+            msg = json.loads(raw)
+        except json.JSONDecodeError:
+            logger.warning("[okx] JSON decode error. Raw={}", str(raw)[:300])
+            return []
+        if not isinstance(msg, dict):
+            return []
+
+        event = msg.get("event")
+        if event is not None:
+            if event == "error":
+                logger.warning("[okx] WS error | code={} | msg={}", msg.get("code"), msg.get("msg"))
+            return []
+
+        return split_books_message(msg, venue=self.name)
+
+    def raw_book(self, ev: RawMsg) -> Optional[Tuple[str, Optional[int], Any, Any]]:
+        seq = ev.get("seqId")
+        return ev.get("_pair") or "", seq if isinstance(seq, int) else None, ev["bids"], ev["asks"]
+
+    def parse_depth(self, ev: RawMsg) -> Optional[OrderBook]:
+        return parse_books_event(ev, top_n=self.top_n)
+
+    def check_sequence(self, ob: OrderBook) -> bool:
+        return self.seq.accept(ob.pair, ob.last_update_id)
+
+    def create_client(self, pairs: List[str]) -> Any:
+        from app.exchanges.okx.ws import OKXWSClient, OKXWSOptions
+
+        return OKXWSClient(
+            OKXWSOptions(
+                ws_url=self.ws_url,
+                pairs=pairs,
+                depth_stream=self.depth_stream,
+                **self.ws_options,
+            ),
+            adapter=self,
+        )
@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional
+
+from app.core.clock import ms_to_ns
+from app.core.models import OrderBook
+from app.core.orderbook import build_orderbook
+
+# для "BTCUSDT" -> "BTC-USDT" (OKX instId завжди з дефісом)
+KNOWN_QUOTES = ("USDT", "USDC", "USD", "EUR", "BTC", "ETH", "OKB", "DAI")
+
+
+def to_inst_id(pair: str) -> str:
+    p = (pair or "").strip().upper()
+    if not p or "-" in p:
+        return p
+    for q in KNOWN_QUOTES:
+        if p.endswith(q) and len(p) > len(q):
+            return f"{p[: -len(q)]}-{q}"
+    return p
+
+
+def split_books_message(msg: Dict[str, Any], venue: str = "okx") -> List[Dict[str, Any]]:
+    """
+    {"arg": {"channel": "books5", "instId": "BTC-USDT"}, "data": [{"bids": [...], "asks": [...], "seqId": ..}]}
+    -> [{"_venue": "okx", "_pair": "BTC-USDT", "bids": [...], "asks": [...], "seqId": ..., "ts": ...}]
+
+    Далі gateway бачить звичний partial book (bids/asks) і роутить його в on_depth.
+    """
+    arg = msg.get("arg")
+    data = msg.get("data")
+    if not isinstance(arg, dict) or not isinstance(data, list):
+        return []
+
+    channel = str(arg.get("channel") or "")
+    if not channel.startswith("books") and channel != "bbo-tbt":
+        return []
+
+    out: List[Dict[str, Any]] = []
+    for d in data:
+        if not isinstance(d, dict):
+            continue
+        out.append(
+            {
+                "_venue": venue,
+                "_pair": d.get("instId") or arg.get("instId"),
+                "bids": d.get("bids") or [],
+                "asks": d.get("asks") or [],
+                "seqId": d.get("seqId"),
+                "ts": d.get("ts"),
+            }
+        )
+    return out
+
+
+def parse_books_event(ev: Dict[str, Any], *, top_n: int) -> Optional[OrderBook]:
+    pair = (ev.get("_pair") or "").upper()
+    if not pair:
+        return None
+
+    seq = ev.get("seqId")
+
+    return build_orderbook(
+        pair=pair,
+        bids_raw=ev.get("bids") or [],
+        asks_raw=ev.get("asks") or [],
+        top_n=top_n,
+        last_update_id=seq if isinstance(seq, int) else None,
+        exchange_ns=ms_to_ns(ev.get("ts")),
+        recv_ns=ev.get("_recv_ns"),
+    )
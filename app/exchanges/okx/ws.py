@@ -0,0 +1,25 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Optional
+
+from app.exchanges.okx.adapter import OKXAdapter
+from app.exchanges.ws import VenueWSClient, WSOptions
+
+
+@dataclass(frozen=True)
+class OKXWSOptions(WSOptions):
+    depth_stream: str = "books5"
+
+    # OKX: 3 requests/sec та 480 subscribe/unsubscribe на годину на з'єднання
+    subscribe_batch_size: int = 100
+    control_msgs_per_sec: float = 2.0
+
+    # books5 пушиться лише на зміну top-5: "ping" -> "pong" тримає last_recv_ns свіжим на тихому стакані
+    # (OKX рекомендує ping, якщо < 30s без даних)
+    heartbeat_sec: float = 2.0
+
+
+class OKXWSClient(VenueWSClient):
+    def __init__(self, opts: OKXWSOptions, adapter: Optional[OKXAdapter] = None):
+        super().__init__(adapter or OKXAdapter(depth_stream=opts.depth_stream), opts)
@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+from typing import Dict, Iterable, List
+
+from app.core.config import AppCfg
+from app.core.runtime import ws_tuning
+from app.exchanges.base import ExchangeAdapter, split_venue_pair
+
+
+def build_adapter(venue: str, cfg: AppCfg) -> ExchangeAdapter:
+    v = venue.lower()
+    ws_options = ws_tuning(cfg.runtime)
+
+    if v == "binance":
+        from app.exchanges.binance.adapter import BinanceAdapter
+
+        return BinanceAdapter(
+            depth_stream=cfg.binance.depth_stream,
+            trade_stream=cfg.binance.trade_stream if cfg.flow.enabled else "",
+            top_n=cfg.binance.top_n,
+            ws_url=cfg.binance.ws_url,
+            ws_options=ws_options,
+        )
+
+    if v == "okx":
+        from app.exchanges.okx.adapter import OKXAdapter
+
+        return OKXAdapter(
+            depth_stream=cfg.okx.depth_stream,
+            top_n=cfg.okx.top_n,
+            ws_url=cfg.okx.ws_url,
+            ws_options=ws_options,
+        )
+
+    raise ValueError(f"Unsupported venue: {venue}")
+
+
+def group_pairs_by_venue(pairs: Iterable[str]) -> Dict[str, List[str]]:
+    # ["BTCUSDT", "okx:BTC-USDT"] -> {"binance": ["BTCUSDT"], "okx": ["BTC-USDT"]}
+    out: Dict[str, List[str]] = {}
+    for entry in pairs:
+        venue, pair = split_venue_pair(entry)
+        if not pair:
+            continue
+        lst = out.setdefault(venue, [])
+        if pair not in lst:
+            lst.append(pair)
+    return out
@@ -0,0 +1,330 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import random
+import socket
+import time
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional
+
+import websockets
+from loguru import logger
+from websockets.exceptions import ConnectionClosed, WebSocketException
+from websockets.extensions.permessage_deflate import ClientPerMessageDeflateFactory
+
+from app.exchanges.base import ExchangeAdapter, RawMsg
+
+
+@dataclass(frozen=True)
+class WSOptions:
+    ws_url: str
+    pairs: List[str]
+
+    ping_interval: int = 20
+    ping_timeout: int = 20
+
+    reconnect_min_delay: float = 0.5
+    reconnect_max_delay: float = 15.0
+    reconnect_backoff: float = 1.7
+    reconnect_jitter: float = 0.25
+
+    subscribe_batch_size: int = 50
+
+    max_streams_per_conn: int = 1024
+    control_msgs_per_sec: float = 4.0
+
+    # app-level heartbeat (adapter.heartbeat_message) після heartbeat_sec тиші; 0 = вимкнено.
+    # Для бірж, що пушать стакан лише на зміну (OKX books5): відповідь оновлює last_recv_ns
+    heartbeat_sec: float = 0.0
+
+    # read path tuning (див. app.core.runtime.ws_tuning)
+    compression: str = "deflate"     # deflate | none
+    deflate_server_no_context_takeover: bool = False
+    deflate_client_max_window_bits: Optional[int] = None
+    deflate_server_max_window_bits: Optional[int] = None
+    max_queue: int = 1000
+    max_size: Optional[int] = 1 << 20
+    rcvbuf_bytes: int = 0
+
+
+def connect_kwargs(opts: WSOptions) -> Dict[str, Any]:
+    kw: Dict[str, Any] = {
+        "ping_interval": opts.ping_interval,
+        "ping_timeout": opts.ping_timeout,
+        "close_timeout": 5,
+        "max_queue": opts.max_queue,
+        "max_size": opts.max_size,
+    }
+
+    compression = (opts.compression or "none").lower()
+    custom_deflate = (
+        opts.deflate_server_no_context_takeover
+        or opts.deflate_client_max_window_bits is not None
+        or opts.deflate_server_max_window_bits is not None
+    )
+
+    if compression != "deflate":
+        kw["compression"] = None
+    elif custom_deflate:
+        # власні параметри permessage-deflate negotiation замість дефолтних websockets
+        kw["compression"] = None
+        kw["extensions"] = [
+            ClientPerMessageDeflateFactory(
+                server_no_context_takeover=opts.deflate_server_no_context_takeover,
+                client_max_window_bits=opts.deflate_client_max_window_bits or True,
+                server_max_window_bits=opts.deflate_server_max_window_bits,
+            )
+        ]
+    else:
+        kw["compression"] = "deflate"
+
+    return kw
+
+
+def set_rcvbuf(ws: Any, size: int) -> None:
+    if size <= 0:
+        return
+    try:
+        sock = ws.transport.get_extra_info("socket")
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, size)
+    except Exception as e:
+        logger.debug("SO_RCVBUF not applied: {}", e)
+
+
+class VenueWSClient:
+    """
+    Спільний reconnect/subscribe цикл для будь-якої біржі.
+    Все venue-специфічне (стріми, керуючі повідомлення, декодування) - в adapter.
+    """
+
+    def __init__(self, adapter: ExchangeAdapter, opts: WSOptions):
+        self.adapter = adapter
+        self.opts = opts
+        self._stop_event = asyncio.Event()
+        self._ws: Optional[Any] = None
+        self._sub_id = 1
+
+        self._pairs: List[str] = []
+        self._n_streams = 0
+        self._send_lock = asyncio.Lock()
+        self._last_control_ts = 0.0
+
+        # liveness з'єднання: monotonic ns останнього фрейму (будь-якого, включно з pong/ack)
+        self.connected = False
+        self.last_recv_ns = 0
+
+        self._add_pairs(opts.pairs)
+
+    @property
+    def pairs(self) -> List[str]:
+        return list(self._pairs)
+
+    def stop(self) -> None:
+        self._stop_event.set()
+
+    def cap_pairs(self, pairs: Iterable[str]) -> List[str]:
+        """
+        Префікс pairs (нормалізований, без дублів), що вміщується в max_streams_per_conn.
+        Для diff-у з живими підписками: решта все одно була б пропущена в _add_pairs.
+        """
+        out: List[str] = []
+        seen = set()
+        n_streams = 0
+        limit = max(1, int(self.opts.max_streams_per_conn))
+
+        for p in pairs:
+            p = self.adapter.normalize_pair(p or "")
+            if not p or p in seen:
+                continue
+            n = len(self.adapter.build_streams([p]))
+            if n_streams + n > limit:
+                break
+            seen.add(p)
+            out.append(p)
+            n_streams += n
+
+        return out
+
+    def _add_pairs(self, pairs: Iterable[str]) -> List[str]:
+        added: List[str] = []
+        known = set(self._pairs)
+        limit = max(1, int(self.opts.max_streams_per_conn))
+
+        for p in pairs:
+            p = self.adapter.normalize_pair(p or "")
+            if not p or p in known:
+                continue
+            n = len(self.adapter.build_streams([p]))
+            if self._n_streams + n > limit:
+                logger.warning(
+                    "[{}] Stream limit per connection reached ({}) -> skip {}",
+                    self.adapter.name,
+                    limit,
+                    p,
+                )
+                continue
+            self._pairs.append(p)
+            self._n_streams += n
+            known.add(p)
+            added.append(p)
+
+        return added
+
+    def _remove_pairs(self, pairs: Iterable[str]) -> List[str]:
+        drop = {self.adapter.normalize_pair(p or "") for p in pairs}
+        removed = [p for p in self._pairs if p in drop]
+        if removed:
+            self._pairs = [p for p in self._pairs if p not in drop]
+            self._n_streams -= len(self.adapter.build_streams(removed))
+        return removed
+
+    async def __aenter__(self) -> "VenueWSClient":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        self.stop()
+        await self._close_ws()
+
+    async def _close_ws(self) -> None:
+        ws = self._ws
+        self._ws = None
+        if ws is None:
+            return
+        try:
+            await ws.close()
+        except Exception:
+            pass
+
+    async def _connect(self) -> Any:
+        logger.info("Connecting to {} WS: {}", self.adapter.name, self.opts.ws_url)
+        ws = await websockets.connect(self.opts.ws_url, **connect_kwargs(self.opts))
+        set_rcvbuf(ws, self.opts.rcvbuf_bytes)
+        self._ws = ws
+        return ws
+
+    async def _send_control(self, ws: Any, msg: Dict[str, Any]) -> None:
+        # rate limit на керуючі повідомлення (subscribe/unsubscribe) в межах одного з'єднання
+        async with self._send_lock:
+            min_interval = 1.0 / max(0.1, float(self.opts.control_msgs_per_sec))
+            wait = self._last_control_ts + min_interval - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+
+            await ws.send(json.dumps(msg))
+            self._last_control_ts = time.monotonic()
+
+    async def _send_batched(self, ws: Any, action: str, pairs: List[str]) -> None:
+        streams = self.adapter.build_streams(pairs)
+
+        batch_size = max(1, int(self.opts.subscribe_batch_size))
+        total_batches = (len(streams) + batch_size - 1) // batch_size
+
+        for i in range(0, len(streams), batch_size):
+            chunk = streams[i : i + batch_size]
+            msg = self.adapter.control_message(action, chunk, self._sub_id)
+            self._sub_id += 1
+
+            await self._send_control(ws, msg)
+            logger.info(
+                "[{}] {}: batch {}/{} | streams={}",
+                self.adapter.name,
+                action.capitalize(),
+                i // batch_size + 1,
+                total_batches,
+                len(chunk),
+            )
+
+    async def _subscribe(self, ws: Any) -> None:
+        if not self._pairs:
+            logger.warning("[{}] No pairs to subscribe", self.adapter.name)
+            return
+        await self._send_batched(ws, "subscribe", self._pairs)
+
+    async def update_pairs(self, *, add: Iterable[str] = (), remove: Iterable[str] = ()) -> None:
+        """
+        Live-зміна підписок без реконекту.
+        Якщо з'єднання зараз немає - оновлюємо тільки список, _subscribe підхопить його при конекті.
+        """
+        removed = self._remove_pairs(remove)
+        added = self._add_pairs(add)
+
+        ws = self._ws
+        if ws is None:
+            return
+
+        try:
+            if removed:
+                await self._send_batched(ws, "unsubscribe", removed)
+            if added:
+                await self._send_batched(ws, "subscribe", added)
+        except (ConnectionClosed, WebSocketException, OSError) as e:
+            # reconnect в messages() перепідпишеться на актуальний список
+            logger.warning("Subscription update failed, will resync on reconnect: {}", e)
+
+    async def _heartbeat(self, ws: Any) -> None:
+        idle_ns = int(self.opts.heartbeat_sec * 1e9)
+        msg = self.adapter.heartbeat_message()
+        try:
+            while True:
+                await asyncio.sleep(self.opts.heartbeat_sec / 2)
+                if time.monotonic_ns() - self.last_recv_ns >= idle_ns:
+                    await ws.send(msg)
+        except (ConnectionClosed, WebSocketException, OSError):
+            # розрив підхопить цикл у messages()
+            return
+
+    async def messages(self) -> AsyncIterator[RawMsg]:
+        delay = self.opts.reconnect_min_delay
+        decode = self.adapter.decode
+
+        while not self._stop_event.is_set():
+            heartbeat = None
+            try:
+                ws = await self._connect()
+                # нова сесія - біржа може почати нумерацію заново, старий last seq тут не валідний
+                guard = getattr(self.adapter, "seq", None)
+                if guard is not None:
+                    guard.reset()
+                self.connected = True
+                self.last_recv_ns = time.monotonic_ns()
+                await self._subscribe(ws)
+                delay = self.opts.reconnect_min_delay
+
+                if self.opts.heartbeat_sec > 0 and getattr(self.adapter, "heartbeat_message", None):
+                    heartbeat = asyncio.create_task(self._heartbeat(ws))
+
+                async for raw in ws:
+                    self.last_recv_ns = time.monotonic_ns()
+                    if self._stop_event.is_set():
+                        break
+                    if not raw:
+                        continue
+
+                    for data in decode(raw):
+                        yield data
+
+            except (ConnectionClosed, WebSocketException, OSError) as e:
+                if self._stop_event.is_set():
+                    break
+                logger.warning("[{}] WS disconnected: {}", self.adapter.name, e)
+
+            except Exception as e:
+                if self._stop_event.is_set():
+                    break
+                logger.exception("[{}] Unexpected WS error: {}", self.adapter.name, e)
+
+            finally:
+                self.connected = False
+                if heartbeat is not None:
+                    heartbeat.cancel()
+                await self._close_ws()
+
+            if self._stop_event.is_set():
+                break
+
+            jitter = 1.0 + (random.random() * 2 - 1) * self.opts.reconnect_jitter
+            sleep_for = min(self.opts.reconnect_max_delay, max(0.0, delay * jitter))
+            logger.info("Reconnecting in {:.2f}s ...", sleep_for)
+            await asyncio.sleep(sleep_for)
+            delay = min(self.opts.reconnect_max_delay, delay * self.opts.reconnect_backoff)
@@ -6,9 +6,10 @@ from app.core.models import TriggerEvent
 
 
 def build_trigger_message(ev: TriggerEvent) -> str:
-    ts = ev.ts
-    if ts.tzinfo is None:
-        ts = ts.replace(tzinfo=timezone.utc)
+    if ev.group_size > 1:
+        return build_storm_message(ev)
+
+    ts = ev.ts  # datetime(UTC) будується тут, на межі sink-а
 
     bid = float(ev.bid_volume)
     ask = float(ev.ask_volume)
@@ -35,3 +36,28 @@ def build_trigger_message(ev: TriggerEvent) -> str:
         "\n"
         f"🕒 Time (UTC): {ts.astimezone(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')}\n"
     )
+
+
+def build_storm_message(ev: TriggerEvent) -> str:
+    # агреговане сповіщення з app.core.correlation: одна подія на весь storm
+    ts = ev.ts
+    ratio = float(ev.metric_value)
+    direction = "🟢 BUY" if ratio >= 0 else "🔴 SELL"
+
+    top = "\n".join(f"  • {pair}: {value * 100:+.2f}%" for pair, value in ev.pairs)
+    repeated = (
+        f"ℹ️ Incl. {ev.already_sent} pairs already alerted individually\n" if ev.already_sent else ""
+    )
+
+    return (
+        f"🌊 MARKET-WIDE ALERT: {ev.group_size} pairs {direction} pressure 🚨\n"
+        "\n"
+        f"🎯 Trigger: {ev.trigger_name}\n"
+        f"⚡️ Metric: {ev.metric}, mean = {ratio:.6f}\n"
+        f"{repeated}"
+        "\n"
+        f"🔝 Top {len(ev.pairs)} by imbalance:\n"
+        f"{top}\n"
+        "\n"
+        f"🕒 Time (UTC): {ts.astimezone(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')}\n"
+    )
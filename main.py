@@ -1,6 +1,10 @@
-from app.logging_setup import setup_logging
-from app.core.runner import run
+import time
+
+T0 = time.perf_counter()
+
+from app.logging_setup import setup_logging  # noqa: E402
+from app.core.runner import run  # noqa: E402
 
 if __name__ == "__main__":
     setup_logging("BinanceTestTracker")
-    run("config/config.yaml")
+    run("config/config.yaml", t0=T0)
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import pytest
+
+from app.core.config import ConfigError, build_config, load_config
+
+
+def test_repo_config_is_valid():
+    cfg = load_config("config/config.yaml", use_cache=False)
+    assert cfg.triggers
+
+
+@pytest.mark.parametrize(
+    "sink",
+    [
+        {"type": "logger", "log_metric": True},
+        {"type": "shm", "max_row": 512},
+        {"type": "stream", "prot": 8765},
+    ],
+)
+def test_unknown_sink_keys_rejected(sink):
+    with pytest.raises(ConfigError, match="Unknown keys in sink"):
+        build_config({"sinks": [sink]})
+
+
+def test_unknown_sink_type_rejected():
+    with pytest.raises(ConfigError, match="Unknown sink type"):
+        build_config({"sinks": [{"type": "kafka"}]})
+
+
+def test_known_sink_keys_accepted():
+    cfg = build_config(
+        {
+            "sinks": [
+                {"type": "logger", "level": "INFO", "log_metrics": True},
+                {"type": "shm", "name": "t", "max_rows": 8, "top_n": 5, "metrics": ["imbalance_ratio"]},
+                {"type": "stream", "host": "127.0.0.1", "port": 0, "max_pending_triggers": 10},
+            ]
+        }
+    )
+    assert len(cfg.sinks) == 3
+
+
+def test_unknown_section_key_rejected():
+    with pytest.raises(ConfigError, match="Unknown keys in 'metrics'"):
+        build_config({"metrics": {"volume_mod": "qty"}})
+
+
+@pytest.mark.parametrize(
+    "raw",
+    [
+        {"correlation": {"enabled": "false"}},
+        {"metrics": {"skip_unchanged": 0}},
+        {"triggers": [{"name": "t", "reevaluate_unchanged": "no"}]},
+    ],
+)
+def test_non_bool_values_for_bool_fields_rejected(raw):
+    with pytest.raises(ConfigError, match="must be true/false"):
+        build_config(raw)
+
+
+def test_schema_change_invalidates_compiled_cache(tmp_path, monkeypatch):
+    import app.core.config as config
+
+    path = tmp_path / "config.yaml"
+    path.write_text("pairs: [BTCUSDT]\n", encoding="utf-8")
+
+    built = []
+    real_build = config.build_config
+    monkeypatch.setattr(config, "build_config", lambda raw: built.append(1) or real_build(raw))
+
+    load_config(str(path))
+    load_config(str(path))
+    assert len(built) == 1  # другий раз - з compiled кешу
+
+    monkeypatch.setattr(config, "_schema_digest", lambda: b"changed schema")
+    assert load_config(str(path)).pairs == ["BTCUSDT"]
+    assert len(built) == 2
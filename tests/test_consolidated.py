@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+from dataclasses import replace
+
+from app.core.consolidated import ConsolidatedBook
+from app.core.orderbook import build_orderbook
+
+SEC = 1_000_000_000
+
+
+def _book(pair: str, recv_ns: int, bid_qty: str = "1"):
+    return build_orderbook(
+        pair=pair,
+        bids_raw=[["100", bid_qty], ["99", "1"]],
+        asks_raw=[["101", "1"], ["102", "1"]],
+        top_n=5,
+        recv_ns=recv_ns,
+    )
+
+
+def test_merges_venues_by_canonical_symbol():
+    c = ConsolidatedBook(top_n=5, min_venues=2)
+    assert c.update("binance", _book("BTCUSDT", SEC)) is None
+
+    agg = c.update("okx", _book("BTC-USDT", SEC))
+    assert agg is not None
+    assert agg.pair == "BTCUSDT"
+    assert agg.bids[0].price == 100.0 and agg.bids[0].qty == 2.0
+    assert sorted(c.venues("BTCUSDT")) == ["binance", "okx"]
+
+
+def test_evicts_venue_without_frames_by_book_time():
+    c = ConsolidatedBook(top_n=5, min_venues=2, max_age_sec=5)
+    c.update("okx", _book("BTC-USDT", SEC))
+    c.update("binance", _book("BTCUSDT", SEC))
+
+    assert c.update("binance", _book("BTCUSDT", 7 * SEC)) is None
+    assert c.venues("BTCUSDT") == ["binance"]
+
+
+def test_quiet_but_connected_venue_stays():
+    # OKX books5 не пушить незмінений стакан, але з'єднання живе (heartbeat/pong)
+    seen = {"okx": SEC, "binance": SEC}
+    c = ConsolidatedBook(top_n=5, min_venues=2, max_age_sec=5, last_seen=seen.get)
+
+    c.update("okx", _book("BTC-USDT", SEC))
+    for t in range(2, 12):
+        seen["okx"] = seen["binance"] = t * SEC
+        agg = c.update("binance", _book("BTCUSDT", t * SEC, bid_qty=str(t)))
+        assert agg is not None
+
+    # з'єднання OKX замовкло -> через max_age_sec біржа випадає
+    seen["binance"] = 20 * SEC
+    assert c.update("binance", _book("BTCUSDT", 20 * SEC)) is None
+    assert c.venues("BTCUSDT") == ["binance"]
+
+
+def test_book_time_is_not_overridden_by_older_liveness():
+    c = ConsolidatedBook(top_n=5, min_venues=2, max_age_sec=5, last_seen=lambda v: 0)
+    ob = _book("BTCUSDT", 10 * SEC)
+    c.update("okx", replace(ob, pair="BTC-USDT"))
+    assert c.update("binance", ob) is not None
+
+
+def test_unchanged_frames_keep_venue_fresh():
+    # skip_unchanged: Binance шле той самий стакан кожні 100ms, OKX оновлюється
+    c = ConsolidatedBook(top_n=5, min_venues=2, max_age_sec=5)
+    c.update("binance", _book("BTCUSDT", SEC))
+
+    for i in range(1, 60):
+        t = SEC + i * SEC // 10
+        c.touch("binance", "BTCUSDT", t)
+        assert c.update("okx", _book("BTC-USDT", t, bid_qty=str(i))) is not None
+
+    assert sorted(c.venues("BTCUSDT")) == ["binance", "okx"]
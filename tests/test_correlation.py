@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+from app.core.clock import NS_PER_SEC
+from app.core.correlation import AlertCorrelator
+from app.core.models import TriggerEvent
+from app.notify.telegram.messages import build_trigger_message
+
+
+def _ev(pair: str, value: float, ts_ns: int = 0) -> TriggerEvent:
+    return TriggerEvent(pair, "strong_sell", "imbalance_ratio", value, 1.0, 10.0, ts_ns, f"{pair} sell")
+
+
+def _storm(corr: AlertCorrelator, n: int) -> TriggerEvent:
+    out = []
+    for i in range(n):
+        out += corr.process(_ev(f"P{i}USDT", -0.5 - i / 100), 0)
+    assert len(out) == corr.min_pairs  # min_pairs - 1 поодиноких + агрегат
+    return out[-1]
+
+
+def test_storm_aggregate_carries_all_group_pairs():
+    corr = AlertCorrelator(window_sec=2.0, bucket_sec=0.25, min_pairs=3, top_pairs=1)
+    agg = _storm(corr, 3)
+
+    assert agg.group_size == 3
+    assert agg.pairs == (("P2USDT", -0.52),)
+    assert agg.group_pairs == {"P0USDT", "P1USDT", "P2USDT"}
+
+
+def test_storm_entry_aggregate_says_earlier_pairs_were_already_sent():
+    corr = AlertCorrelator(window_sec=2.0, bucket_sec=0.25, min_pairs=3, top_pairs=5)
+    agg = _storm(corr, 3)
+
+    # P0/P1 пройшли окремо, агрегат їх включає - і прямо про це каже
+    assert agg.already_sent == 2
+    assert "incl. 2 already alerted" in agg.message
+    assert "Incl. 2 pairs already alerted individually" in build_trigger_message(agg)
+
+
+def test_delivered_pairs_outside_window_are_not_counted_as_repeats():
+    corr = AlertCorrelator(window_sec=2.0, bucket_sec=0.25, min_pairs=3, top_pairs=5)
+    corr.process(_ev("OLDUSDT", -0.9), 0)
+
+    late = 5 * NS_PER_SEC
+    out = []
+    for i in range(3):
+        out += corr.process(_ev(f"P{i}USDT", -0.5), late)
+
+    agg = out[-1]
+    assert agg.group_pairs == {"P0USDT", "P1USDT", "P2USDT"}
+    assert agg.already_sent == 2
+
+
+def test_single_pending_event_is_flushed_unchanged():
+    corr = AlertCorrelator(window_sec=2.0, bucket_sec=0.25, min_pairs=3, top_pairs=1)
+    _storm(corr, 3)
+
+    late = _ev("P1USDT", -0.7, 1)
+    assert corr.process(late, NS_PER_SEC // 10) == []
+
+    out = corr.flush(2 * NS_PER_SEC + NS_PER_SEC // 10)
+    assert out == [late]
+    assert corr.stats()["storms"] == 0
+
+
+def test_pending_storm_update_is_aggregated():
+    corr = AlertCorrelator(window_sec=2.0, bucket_sec=0.25, min_pairs=3, top_pairs=5)
+    _storm(corr, 3)
+
+    corr.process(_ev("P1USDT", -0.7, 1), NS_PER_SEC // 10)
+    corr.process(_ev("P9USDT", -0.6, 1), NS_PER_SEC // 10)
+
+    (agg,) = corr.flush(2 * NS_PER_SEC + NS_PER_SEC // 10)
+    assert agg.group_size == 2
+    assert agg.pair == "2 pairs"
+    assert agg.group_pairs == {"P1USDT", "P9USDT"}
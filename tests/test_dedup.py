@@ -0,0 +1,25 @@
+from __future__ import annotations
+
+from app.core.dedup import BookChangeCache
+
+BIDS = [["100.0", "1.0"], ["99.9", "2.0"]]
+ASKS = [["100.1", "1.5"]]
+
+
+def test_same_seq_and_same_levels_are_unchanged():
+    c = BookChangeCache()
+
+    assert not c.is_unchanged("binance|BTCUSDT", 10, BIDS, ASKS)
+    assert c.is_unchanged("binance|BTCUSDT", 10, BIDS, ASKS)
+    assert c.is_unchanged("binance|BTCUSDT", 11, BIDS, ASKS)   # апдейт глибше за top-N
+    assert not c.is_unchanged("binance|BTCUSDT", 12, BIDS, [["100.1", "1.6"]])
+    assert c.stats()["skipped_seq"] == 1 and c.stats()["skipped_same"] == 1
+
+
+def test_forget_makes_next_snapshot_changed():
+    # пара прибрана з universe і повернулась: тихий стакан має дати метрику одразу
+    c = BookChangeCache()
+    c.is_unchanged("binance|BTCUSDT", 10, BIDS, ASKS)
+
+    c.forget("binance|BTCUSDT")
+    assert not c.is_unchanged("binance|BTCUSDT", 10, BIDS, ASKS)
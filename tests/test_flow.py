@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from app.core.flow import OFI_METRIC, TRADE_DELTA_METRIC, FlowTracker, RollingSums
+from app.core.models import Level, OrderBook
+from app.core.runner import only_depth_and_trade_streams
+
+T0 = 1_700_000_000_000
+
+
+def _ob(bid: float, bid_q: float, ask: float, ask_q: float) -> OrderBook:
+    return OrderBook("BTCUSDT", [Level(bid, bid_q)], [Level(ask, ask_q)], recv_ns=1)
+
+
+def test_rolling_sums_evicts_buckets_and_drops_out_of_window():
+    r = RollingSums(window_ms=3000, bucket_ms=1000)
+    r.add(0, 0, 1.0)
+    r.add(1500, 0, 2.0)
+    r.add(2500, 1, 4.0)
+    assert r.totals == [3.0, 4.0]
+
+    r.add(3000, 0, 8.0)            # bucket 0 випадає з вікна
+    assert r.totals == [10.0, 4.0]
+
+    r.add(500, 0, 100.0)           # старіше за вікно -> ігнор
+    r.add(1200, 1, 1.0)            # запізнілий, але ще у вікні
+    assert r.totals == [10.0, 5.0]
+
+    r.advance(10_000)              # розрив довший за вікно -> все очищено
+    assert r.totals == [0.0, 0.0]
+
+
+def test_rolling_sums_totals_stay_exact_over_ring_wraps():
+    r = RollingSums(window_ms=1000, bucket_ms=100)
+    for i, ts in enumerate(range(0, 50_000, 10)):
+        r.add(ts, i % 2, 0.1)
+    # у вікні 10 bucket-ів x 10 подій, по 5 на канал
+    assert r.totals == pytest.approx([5.0, 5.0])
+
+
+@pytest.mark.parametrize(
+    "nxt, pos, neg",
+    [
+        ((100.0, 3.0, 101.0, 1.0), 2.0, 0.0),   # bid той самий, qty росте -> +dq
+        ((100.5, 1.0, 101.0, 1.0), 1.0, 0.0),   # bid вгору -> +новий bid qty
+        ((99.5, 1.0, 101.0, 1.0), 0.0, 1.0),    # bid вниз -> -старий bid qty
+        ((100.0, 1.0, 100.8, 2.0), 0.0, 2.0),   # ask вниз -> -новий ask qty
+        ((100.0, 1.0, 101.5, 2.0), 1.0, 0.0),   # ask вгору -> +старий ask qty
+        ((100.0, 1.0, 101.0, 4.0), 0.0, 3.0),   # ask той самий, qty росте -> -dq
+    ],
+)
+def test_ofi_sign_rules(nxt, pos, neg):
+    f = FlowTracker(publish_ms=0)
+    assert f.on_book(_ob(100.0, 1.0, 101.0, 1.0), ts_ms=T0) is None  # перший top - тільки база
+
+    mp = f.on_book(_ob(*nxt), ts_ms=T0 + 100)
+    assert mp.name == OFI_METRIC
+    assert (mp.bid_volume, mp.ask_volume) == (pos, neg)
+    assert mp.value == (1.0 if pos else -1.0)
+
+
+def test_trade_delta_publish_is_throttled_per_pair():
+    f = FlowTracker(publish_ms=1000)
+
+    mp = f.on_trade("BTCUSDT", T0, 100.0, 2.0, buyer_is_maker=False)
+    assert mp.name == TRADE_DELTA_METRIC and mp.value == 1.0
+
+    assert f.on_trade("BTCUSDT", T0 + 500, 100.0, 1.0, buyer_is_maker=True) is None
+    assert f.on_trade("ETHUSDT", T0 + 500, 10.0, 1.0, buyer_is_maker=True) is not None
+
+    mp = f.on_trade("BTCUSDT", T0 + 1000, 100.0, 1.0, buyer_is_maker=True)
+    assert (mp.bid_volume, mp.ask_volume) == (2.0, 2.0)
+    assert mp.value == 0.0
+
+
+def test_forget_drops_pair_state():
+    f = FlowTracker(publish_ms=0)
+    f.on_book(_ob(100.0, 1.0, 101.0, 1.0), ts_ms=T0)
+    f.forget("BTCUSDT")
+    # після forget перший top знову лише база
+    assert f.on_book(_ob(100.0, 3.0, 101.0, 1.0), ts_ms=T0 + 100) is None
+
+
+@pytest.mark.parametrize("trade_stream", ["aggTrade", "trade"])
+def test_stream_filter_follows_configured_trade_stream(trade_stream):
+    mw = only_depth_and_trade_streams(trade_stream)
+
+    def passes(stream: str) -> bool:
+        return asyncio.run(mw({"stream": stream, "data": {}})) is not None
+
+    assert passes("btcusdt@depth10@100ms")
+    assert passes(f"btcusdt@{trade_stream}")
+    assert not passes("btcusdt@bookTicker")
+    other = "trade" if trade_stream == "aggTrade" else "aggTrade"
+    assert not passes(f"btcusdt@{other}")
@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+from app.exchanges.base import SequenceGuard
+from app.exchanges.okx.adapter import OKXAdapter
+from app.exchanges.okx.parser import parse_books_event, split_books_message, to_inst_id
+
+FRAMES = Path(__file__).parent / "fixtures" / "okx_books5.jsonl"
+
+
+def _frames():
+    return FRAMES.read_text(encoding="utf-8").splitlines()
+
+
+def test_to_inst_id():
+    assert to_inst_id("BTCUSDT") == "BTC-USDT"
+    assert to_inst_id("ethusdc") == "ETH-USDC"
+    assert to_inst_id(" BTC-USDT ") == "BTC-USDT"
+    assert to_inst_id("ETHBTC") == "ETH-BTC"
+    assert to_inst_id("USDT") == "USDT"
+    assert to_inst_id("") == ""
+
+
+def test_split_books_message_recorded():
+    msg = json.loads(_frames()[1])
+    out = split_books_message(msg)
+
+    assert len(out) == 1
+    ev = out[0]
+    assert ev["_venue"] == "okx"
+    assert ev["_pair"] == "BTC-USDT"
+    assert ev["seqId"] == 41226000101
+    assert ev["ts"] == "1717000000123"
+    assert len(ev["bids"]) == 5 and len(ev["asks"]) == 5
+
+
+def test_split_books_message_ignores_other_channels():
+    assert split_books_message({"arg": {"channel": "trades", "instId": "BTC-USDT"}, "data": [{}]}) == []
+    assert split_books_message({"event": "subscribe"}) == []
+
+
+def test_parse_books_event_recorded():
+    ev = split_books_message(json.loads(_frames()[1]))[0]
+    ob = parse_books_event(ev, top_n=5)
+
+    assert ob is not None
+    assert ob.pair == "BTC-USDT"
+    assert ob.last_update_id == 41226000101
+    assert ob.exchange_ns == 1717000000123 * 1_000_000
+    assert [l.price for l in ob.bids] == sorted((l.price for l in ob.bids), reverse=True)
+    assert [l.price for l in ob.asks] == sorted(l.price for l in ob.asks)
+    assert ob.bids[0].price == 67012.0 and ob.bids[0].qty == 1.85
+    assert ob.asks[0].price == 67012.1 and ob.asks[0].qty == 0.41
+
+
+def test_adapter_decode_recorded_frames():
+    adapter = OKXAdapter(top_n=5)
+    books = [ob for raw in _frames() for ev in adapter.decode(raw) if (ob := adapter.parse_depth(ev))]
+
+    # subscribe ack і error не дають подій
+    assert [ob.pair for ob in books] == ["BTC-USDT", "BTC-USDT", "ETH-USDT"]
+    assert all(adapter.check_sequence(ob) for ob in books)
+    assert adapter.decode("pong") == []
+
+
+def test_sequence_guard_drops_stale_then_resyncs():
+    g = SequenceGuard(max_stale=3)
+
+    assert g.accept("BTC-USDT", 100)
+    assert g.accept("BTC-USDT", 101)
+    assert not g.accept("BTC-USDT", 50)    # застарілий
+    assert not g.accept("BTC-USDT", 99)
+    assert g.dropped == 2
+
+    # третій застарілий поспіль -> біржа скинула нумерацію, приймаємо і далі йдемо від нового seq
+    assert g.accept("BTC-USDT", 7)
+    assert g.accept("BTC-USDT", 8)
+    assert not g.accept("BTC-USDT", 6)
+
+    # None seq і інші пари не зачіпаються
+    assert g.accept("BTC-USDT", None)
+    assert g.accept("ETH-USDT", 1)
+
+
+def test_sequence_guard_accepts_repeated_seq_without_counting_stale():
+    # Binance depth10@100ms на тихій парі шле той самий lastUpdateId кожні 100ms
+    g = SequenceGuard(max_stale=3)
+
+    assert all(g.accept("BTCUSDT", 500) for _ in range(120))
+    assert g.dropped == 0
+
+    # повтори не наближають "ресинхронізацію": застарілий seq після них все ще відкидається
+    assert not g.accept("BTCUSDT", 499)
+    assert g.accept("BTCUSDT", 500)
+    assert not g.accept("BTCUSDT", 498)
+    assert g.dropped == 2
@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import os
+
+import pytest
+
+from app.core.clock import mono_to_wall_ns
+from app.core.models import MetricPoint
+from app.core.orderbook import build_orderbook
+from app.core.shm import ShmTableReader, ShmTableWriter
+
+
+@pytest.fixture
+def name():
+    return f"imbt_test_{os.getpid()}"
+
+
+def _book(pair: str, recv_ns: int):
+    return build_orderbook(pair=pair, bids_raw=[["100", "2"]], asks_raw=[["101", "1"]], top_n=5, recv_ns=recv_ns)
+
+
+def test_book_and_metric_roundtrip(name):
+    w = ShmTableWriter(name, max_rows=4, top_n=5, metrics=["imbalance_ratio"])
+    r = ShmTableReader(name)
+    try:
+        w.write_book(_book("BTCUSDT", 10**9))
+        w.write_metric(
+            MetricPoint(pair="BTCUSDT", name="imbalance_ratio", value=0.5, bid_volume=2, ask_volume=1, ts_ns=10**9)
+        )
+        snap = r.snapshot("BTCUSDT")
+        assert snap.bids == [(100.0, 2.0)]
+        assert snap.book_ts_ns == mono_to_wall_ns(10**9)
+        assert r.metric("BTCUSDT", "imbalance_ratio").value == 0.5
+    finally:
+        r.close()
+        w.close()
+
+
+def test_touch_book_refreshes_ts_only(name):
+    w = ShmTableWriter(name, max_rows=4, top_n=5)
+    r = ShmTableReader(name)
+    try:
+        w.write_book(_book("BTCUSDT", 10**9))
+        w.touch_book("BTCUSDT", 12345)
+        w.touch_book("ETHUSDT", 1)  # невідома пара - без рядка
+
+        snap = r.snapshot("BTCUSDT")
+        assert snap.book_ts_ns == 12345
+        assert len(snap.bids) == 1 and len(snap.asks) == 1
+        assert r.pairs() == ["BTCUSDT"]
+    finally:
+        r.close()
+        w.close()
+
+
+def test_released_rows_are_reused_and_reader_reindexes(name):
+    w = ShmTableWriter(name, max_rows=2, top_n=5)
+    r = ShmTableReader(name)
+    try:
+        w.write_book(_book("AAAUSDT", 1))
+        w.write_book(_book("BBBUSDT", 2))
+        assert sorted(r.pairs()) == ["AAAUSDT", "BBBUSDT"]
+        assert r.snapshot("AAAUSDT") is not None
+
+        w.write_book(_book("CCCUSDT", 3))   # таблиця повна
+        assert w.dropped_pairs == 1
+
+        w.release("AAAUSDT")
+        w.write_book(_book("CCCUSDT", 4))
+        assert w.dropped_pairs == 1
+
+        # reader з кешованим індексом не повинен віддати CCC під ім'ям AAA
+        assert r.snapshot("AAAUSDT") is None
+        assert r.snapshot("CCCUSDT").book_ts_ns == mono_to_wall_ns(4)
+        assert sorted(r.pairs()) == ["BBBUSDT", "CCCUSDT"]
+    finally:
+        r.close()
+        w.close()
+
+
+def test_live_owner_segment_is_not_taken_over(name):
+    w = ShmTableWriter(name, max_rows=2, top_n=5)
+    try:
+        w.buf[28:32] = (1).to_bytes(4, "little")   # owner_pid = 1 (init, завжди живий)
+        with pytest.raises(FileExistsError, match="owned by a running process"):
+            ShmTableWriter(name, max_rows=2, top_n=5)
+    finally:
+        w.close()
+
+
+def test_orphaned_segment_is_reclaimed(name):
+    w = ShmTableWriter(name, max_rows=2, top_n=5)
+    w.buf[28:32] = (2**31 - 2).to_bytes(4, "little")  # pid, якого немає
+    w.close(unlink=False)
+
+    w2 = ShmTableWriter(name, max_rows=2, top_n=5)
+    w2.close()
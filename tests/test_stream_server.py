@@ -0,0 +1,203 @@
+from __future__ import annotations
+
+import asyncio
+import json
+
+import websockets
+from websockets.exceptions import ConnectionClosedError
+
+import app.core.stream_server as stream_server
+from app.core.models import MetricPoint, TriggerEvent
+from app.core.stream_server import StreamServerSink, _Client
+
+
+def _mp(pair: str, value: float, ts_ns: int = 1) -> MetricPoint:
+    return MetricPoint(pair, "imbalance_ratio", value, 1.0, 1.0, ts_ns)
+
+
+def _ev(pair: str) -> TriggerEvent:
+    return TriggerEvent(pair, "strong_buy", "imbalance_ratio", 0.9, 10.0, 1.0, 1, f"{pair} buy")
+
+
+class _StalledWS:
+    # stand-in повільного клієнта: send висить, поки тест не відпустить gate
+    remote_address = ("stalled", 0)
+
+    def __init__(self) -> None:
+        self.gate = asyncio.Event()
+        self.sent: list = []
+
+    async def send(self, payload: str) -> None:
+        self.sent.append(json.loads(payload))
+        await self.gate.wait()
+
+
+async def _until(cond, timeout: float = 5.0) -> None:
+    async def poll():
+        while not cond():
+            await asyncio.sleep(0.005)
+
+    await asyncio.wait_for(poll(), timeout)
+
+
+async def _started() -> tuple:
+    sink = StreamServerSink(port=0)
+    await sink.start()
+    return sink, sink._server.sockets[0].getsockname()[1]
+
+
+async def _subscribe(sink: StreamServerSink, ws, n_clients: int, **msg) -> None:
+    await ws.send(json.dumps({"op": "subscribe", **msg}))
+    await _until(lambda: len(sink._clients) >= n_clients and all(c.pairs for c in sink._clients))
+
+
+def _attach_stalled(sink: StreamServerSink) -> _StalledWS:
+    ws = _StalledWS()
+    c = _Client(ws, sink.max_pending_triggers)
+    c.pairs.add(stream_server.ALL)
+    c.task = asyncio.create_task(c.sender())
+    sink._clients.add(c)
+    return ws
+
+
+def test_slow_client_gets_latest_value_not_a_queue():
+    async def main():
+        sink = StreamServerSink()
+        ws = _attach_stalled(sink)
+
+        await sink.on_metric(_mp("BTCUSDT", 0.0))
+        await _until(lambda: len(ws.sent) == 1)  # sender завис на першому send
+
+        for v in range(1, 10):
+            await sink.on_metric(_mp("BTCUSDT", float(v)))
+        await sink.on_metric(_mp("ETHUSDT", -1.0))
+
+        ws.gate.set()
+        await _until(lambda: len(ws.sent) == 3)
+        await asyncio.sleep(0.02)
+        await sink.close()
+        return ws.sent
+
+    sent = asyncio.run(main())
+    assert [(m["pair"], m["value"]) for m in sent] == [("BTCUSDT", 0.0), ("BTCUSDT", 9.0), ("ETHUSDT", -1.0)]
+
+
+def test_fast_client_is_not_held_back_by_stalled_one():
+    async def main():
+        sink, port = await _started()
+        stalled = _attach_stalled(sink)
+        try:
+            async with websockets.connect(f"ws://127.0.0.1:{port}") as fast:
+                await _subscribe(sink, fast, 2, pairs=["BTCUSDT"])
+
+                got = []
+                for v in range(5):
+                    await sink.on_metric(_mp("BTCUSDT", float(v)))
+                    got.append(json.loads(await asyncio.wait_for(fast.recv(), 2))["value"])
+
+                await sink.on_trigger(_ev("BTCUSDT"))
+                trig = json.loads(await asyncio.wait_for(fast.recv(), 2))
+        finally:
+            stalled.gate.set()
+            await sink.close()
+        return got, trig, stalled.sent
+
+    got, trig, stalled_sent = asyncio.run(main())
+    assert got == [0.0, 1.0, 2.0, 3.0, 4.0]
+    assert trig["type"] == "trigger" and trig["pair"] == "BTCUSDT"
+    assert len(stalled_sent) == 1
+
+
+def test_one_encoded_payload_per_tick(monkeypatch):
+    calls = []
+    real = stream_server.encode_metric
+
+    def counting(mp):
+        calls.append(mp.pair)
+        return real(mp)
+
+    monkeypatch.setattr(stream_server, "encode_metric", counting)
+
+    async def main():
+        sink, port = await _started()
+        try:
+            clients = []
+            for i in range(1, 4):
+                clients.append(await websockets.connect(f"ws://127.0.0.1:{port}"))
+                await _subscribe(sink, clients[-1], i, pairs=["*"])
+
+            await sink.on_metric(_mp("BTCUSDT", 0.5))
+            got = [json.loads(await asyncio.wait_for(ws.recv(), 2)) for ws in clients]
+            for ws in clients:
+                await ws.close()
+        finally:
+            await sink.close()
+        return got
+
+    got = asyncio.run(main())
+    assert calls == ["BTCUSDT"]
+    assert [m["value"] for m in got] == [0.5, 0.5, 0.5]
+
+
+def test_subscribe_and_unsubscribe_filter_pairs():
+    async def main():
+        sink, port = await _started()
+        try:
+            async with websockets.connect(f"ws://127.0.0.1:{port}") as ws:
+                await _subscribe(sink, ws, 1, pairs=["btcusdt"])
+
+                await sink.on_metric(_mp("ETHUSDT", 0.1))
+                await sink.on_metric(_mp("BTCUSDT", 0.2))
+                first = json.loads(await asyncio.wait_for(ws.recv(), 2))
+
+                await ws.send(json.dumps({"op": "unsubscribe", "pairs": ["BTCUSDT"]}))
+                await ws.send(json.dumps({"op": "subscribe", "pairs": ["ETHUSDT"]}))
+                await _until(lambda: next(iter(sink._clients)).pairs == {"ETHUSDT"})
+
+                await sink.on_trigger(_ev("BTCUSDT"))
+                await sink.on_trigger(_ev("ETHUSDT"))
+                second = json.loads(await asyncio.wait_for(ws.recv(), 2))
+        finally:
+            await sink.close()
+        return first, second
+
+    first, second = asyncio.run(main())
+    assert (first["type"], first["pair"]) == ("metric", "BTCUSDT")
+    assert (second["type"], second["pair"]) == ("trigger", "ETHUSDT")
+
+
+def test_sender_returns_quietly_when_client_is_gone():
+    class _Gone:
+        async def send(self, payload: str) -> None:
+            raise ConnectionClosedError(None, None)
+
+    async def main():
+        c = _Client(_Gone(), 10)
+        c.task = asyncio.create_task(c.sender())
+        c.offer_trigger("x")
+        await asyncio.wait_for(c.task, 2)
+        return c.task
+
+    task = asyncio.run(main())
+    assert task.done() and task.exception() is None
+
+
+def test_aggregate_reaches_subscribers_of_any_group_pair():
+    agg = TriggerEvent(
+        "3 pairs", "strong_buy", "imbalance_ratio", 0.8, 30.0, 3.0, 1, "storm",
+        group_size=3, pairs=(("BTCUSDT", 0.9),), group_pairs=frozenset({"BTCUSDT", "ETHUSDT", "SOLUSDT"}),
+    )
+
+    async def main():
+        sink, port = await _started()
+        try:
+            async with websockets.connect(f"ws://127.0.0.1:{port}") as ws:
+                await _subscribe(sink, ws, 1, pairs=["SOLUSDT"])
+                await sink.on_trigger(agg)
+                return json.loads(await asyncio.wait_for(ws.recv(), 2))
+        finally:
+            await sink.close()
+
+    msg = asyncio.run(main())
+    assert msg["group_size"] == 3
+    assert msg["group_pairs"] == ["BTCUSDT", "ETHUSDT", "SOLUSDT"]
@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import random
+
+import pytest
+
+from app.backtest.sweep import engine_fire_indices, fire_indices, grid_from_spec, run_sweep
+from app.core.config import build_config
+from app.core.triggers import compile_trigger
+from tools.bench_alert_storm import storm_frames
+
+
+def _series(n: int = 3000, seed: int = 3):
+    rnd = random.Random(seed)
+    ts, vals = [], []
+    t = 1_700_000_000.0
+    v = 0.0
+    for _ in range(n):
+        t += rnd.choice((0.1, 0.1, 0.1, 0.5, 2.0))
+        v = max(-1.0, min(1.0, v * 0.9 + rnd.gauss(0.0, 0.15)))
+        ts.append(t)
+        vals.append(v)
+    return ts, vals
+
+
+@pytest.mark.parametrize(
+    "trig",
+    [
+        {"name": "buy", "op": ">=", "value": 0.2, "cooldown_sec": 0, "emit": "edge"},
+        {"name": "buy_cd", "op": ">", "value": 0.1, "cooldown_sec": 3, "emit": "edge"},
+        {"name": "sell_always", "op": "<=", "value": -0.2, "cooldown_sec": 0, "emit": "always"},
+        {"name": "sell_always_cd", "op": "<", "value": -0.1, "cooldown_sec": 1.5, "emit": "always"},
+    ],
+)
+def test_fire_indices_matches_trigger_engine(trig):
+    ts, vals = _series()
+    t = compile_trigger(trig)
+
+    fast = fire_indices(ts, vals, 100, len(ts), t)
+    assert fast
+    assert fast == engine_fire_indices("BTCUSDT", ts, vals, 100, len(ts), t)
+
+
+def test_grid_from_spec_expands_product():
+    combos, horizons = grid_from_spec(
+        {
+            "volume_mode": ["qty", "notional"],
+            "horizons_sec": 30,
+            "triggers": [
+                {"name": "b", "op": ">=", "value": [0.1, 0.2, 0.3], "cooldown_sec": [0, 10], "emit": "edge"},
+                {"name": "s", "op": "<=", "value": -0.2},
+            ],
+        }
+    )
+
+    assert horizons == [30.0]
+    assert len(combos) == 3 * 2 * 2 + 2
+    assert {(c.trigger.value, c.trigger.cooldown_sec, c.volume_mode) for c in combos if c.trigger.name == "b"} == {
+        (v, cd, m) for v in (0.1, 0.2, 0.3) for cd in (0.0, 10.0) for m in ("qty", "notional")
+    }
+
+
+@pytest.mark.parametrize(
+    "spec, match",
+    [
+        ({"volume_mode": ["lots"], "triggers": [{"name": "b"}]}, "volume_mode"),
+        ({"triggers": [{"name": "f", "metric": "ofi_ratio"}]}, "imbalance_ratio"),
+    ],
+)
+def test_grid_from_spec_rejects_unsupported(spec, match):
+    with pytest.raises(ValueError, match=match):
+        grid_from_spec(spec)
+
+
+def test_run_sweep_end_to_end_with_workers(tmp_path):
+    frames = tmp_path / "frames.jsonl"
+    frames.write_text("\n".join(storm_frames(4, 90, storm_every_sec=30, top_n=5)), encoding="utf-8")
+
+    spec = {
+        "volume_mode": ["qty"],
+        "horizons_sec": [5],
+        "triggers": [{"name": "buy", "op": ">=", "value": [0.2, 0.3], "cooldown_sec": [0, 5]}],
+    }
+    cfg = build_config({"binance": {"top_n": 5}})
+
+    rows = run_sweep(str(frames), cfg, spec, workers=2, verify=True)
+
+    assert len(rows) == 4
+    by_key = {(r["value"], r["cooldown_sec"]): r for r in rows}
+    assert all(r["fires"] > 0 for r in rows)
+    # вищий поріг / довший cooldown не дають більше спрацювань
+    assert by_key[(0.3, 0.0)]["fires"] <= by_key[(0.2, 0.0)]["fires"]
+    assert by_key[(0.2, 5.0)]["fires"] <= by_key[(0.2, 0.0)]["fires"]
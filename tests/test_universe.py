@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+
+from loguru import logger
+
+import app.exchanges.binance.universe as universe
+from app.core.config import UniverseCfg
+from app.exchanges.binance.universe import diff_pairs, merge_pinned, run_universe_refresh, select_universe
+from app.exchanges.binance.ws import BinanceWSClient, BinanceWSOptions
+
+EXCHANGE_INFO = {
+    "symbols": [
+        {"symbol": "BTCUSDT", "status": "TRADING", "quoteAsset": "USDT", "isSpotTradingAllowed": True},
+        {"symbol": "ETHUSDT", "status": "TRADING", "quoteAsset": "USDT", "isSpotTradingAllowed": True},
+        {"symbol": "SOLUSDT", "status": "TRADING", "quoteAsset": "USDT"},
+        {"symbol": "XRPUSDT", "status": "TRADING", "quoteAsset": "USDT"},
+        {"symbol": "OLDUSDT", "status": "BREAK", "quoteAsset": "USDT"},
+        {"symbol": "MARGUSDT", "status": "TRADING", "quoteAsset": "USDT", "isSpotTradingAllowed": False},
+        {"symbol": "ETHBTC", "status": "TRADING", "quoteAsset": "BTC"},
+    ]
+}
+TICKERS = [
+    {"symbol": "BTCUSDT", "quoteVolume": "900"},
+    {"symbol": "ETHUSDT", "quoteVolume": "500"},
+    {"symbol": "SOLUSDT", "quoteVolume": "500"},
+    {"symbol": "XRPUSDT", "quoteVolume": "5"},
+    {"symbol": "OLDUSDT", "quoteVolume": "10000"},
+    {"symbol": "MARGUSDT", "quoteVolume": "10000"},
+    {"symbol": "ETHBTC", "quoteVolume": "10000"},
+]
+
+
+def _client(**kw) -> BinanceWSClient:
+    return BinanceWSClient(BinanceWSOptions(ws_url="ws://unused", pairs=[], **kw))
+
+
+def test_select_universe_filters_and_ranks():
+    sel = select_universe(EXCHANGE_INFO, TICKERS, quote_asset="usdt", min_quote_volume=10, max_pairs=0)
+    # rank за quoteVolume desc, при рівності - за символом
+    assert sel == ["BTCUSDT", "ETHUSDT", "SOLUSDT"]
+
+    assert select_universe(EXCHANGE_INFO, TICKERS, quote_asset="USDT", min_quote_volume=0, max_pairs=2) == [
+        "BTCUSDT",
+        "ETHUSDT",
+    ]
+    assert select_universe(
+        EXCHANGE_INFO, TICKERS, quote_asset="USDT", min_quote_volume=0, max_pairs=0, exclude=["ethusdt"]
+    ) == ["BTCUSDT", "SOLUSDT", "XRPUSDT"]
+
+
+def test_merge_pinned_keeps_pinned_first_without_duplicates():
+    assert merge_pinned([" btcusdt", "DOGEUSDT", ""], ["ETHUSDT", "BTCUSDT"]) == ["BTCUSDT", "DOGEUSDT", "ETHUSDT"]
+
+
+def test_diff_pairs():
+    assert diff_pairs(["BTCUSDT", "ethusdt"], ["ETHUSDT", "SOLUSDT"]) == (["SOLUSDT"], ["BTCUSDT"])
+    assert diff_pairs(["BTCUSDT"], ["btcusdt"]) == ([], [])
+
+
+class _RecordingWS:
+    def __init__(self) -> None:
+        self.sent: list = []
+
+    async def send(self, raw: str) -> None:
+        self.sent.append((time.monotonic(), json.loads(raw)))
+
+
+def test_update_pairs_batches_and_paces_control_messages():
+    client = _client(subscribe_batch_size=2, control_msgs_per_sec=20.0)
+    ws = client._ws = _RecordingWS()
+
+    asyncio.run(client.update_pairs(add=["a1usdt", "A2USDT", "A3USDT", "A4USDT", "A5USDT"]))
+    asyncio.run(client.update_pairs(remove=["A2USDT", "A4USDT"]))
+
+    msgs = [m for _, m in ws.sent]
+    assert [m["method"] for m in msgs] == ["SUBSCRIBE"] * 3 + ["UNSUBSCRIBE"]
+    assert [len(m["params"]) for m in msgs] == [2, 2, 1, 2]
+    assert msgs[0]["params"] == ["a1usdt@depth10@100ms", "a2usdt@depth10@100ms"]
+    assert len({m["id"] for m in msgs}) == 4
+    assert client.pairs == ["A1USDT", "A3USDT", "A5USDT"]
+
+    gaps = [b - a for (a, _), (b, _) in zip(ws.sent, ws.sent[1:])]
+    assert min(gaps) >= 0.05 * 0.9
+
+
+def test_cap_pairs_respects_stream_limit():
+    client = _client(max_streams_per_conn=3)
+    assert client.cap_pairs(["btcusdt", "BTCUSDT", "ETHUSDT", "SOLUSDT", "XRPUSDT"]) == [
+        "BTCUSDT",
+        "ETHUSDT",
+        "SOLUSDT",
+    ]
+
+
+def test_refresh_over_stream_limit_warns_once_and_does_not_resubscribe(monkeypatch):
+    client = _client(max_streams_per_conn=2)
+    client._add_pairs(["BTCUSDT"])
+    client._ws = ws = _RecordingWS()
+    stop = asyncio.Event()
+    calls = []
+
+    async def fake_resolve(cfg, pinned):
+        calls.append(1)
+        if len(calls) == 2:
+            stop.set()
+        return ["BTCUSDT", "ETHUSDT", "SOLUSDT", "XRPUSDT"]
+
+    monkeypatch.setattr(universe, "resolve_universe", fake_resolve)
+
+    warnings: list = []
+    sink_id = logger.add(lambda m: warnings.append(m.record["message"]), level="WARNING")
+    try:
+        asyncio.run(run_universe_refresh(client, UniverseCfg(refresh_sec=1.0), [], stop))
+    finally:
+        logger.remove(sink_id)
+
+    assert len(calls) == 2
+    assert client.pairs == ["BTCUSDT", "ETHUSDT"]
+    assert len(ws.sent) == 1  # тільки перший refresh підписує ETHUSDT
+    assert len([w for w in warnings if "stream limit" in w]) == 1
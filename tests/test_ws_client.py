@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import asyncio
+import json
+from pathlib import Path
+
+import websockets
+
+from app.exchanges.okx.ws import OKXWSClient, OKXWSOptions
+
+FRAMES = Path(__file__).parent / "fixtures" / "okx_books5.jsonl"
+
+
+async def _stand_in(received: list):
+    # локальний stand-in OKX: чекає subscribe, віддає записані фрейми
+    frames = FRAMES.read_text(encoding="utf-8").splitlines()
+
+    async def handler(ws):
+        received.append(json.loads(await ws.recv()))
+        for f in frames:
+            await ws.send(f)
+        await ws.wait_closed()
+
+    return await websockets.serve(handler, "127.0.0.1", 0)
+
+
+def test_okx_client_subscribes_and_receives_through_stand_in():
+    async def main():
+        received: list = []
+        server = await _stand_in(received)
+        port = server.sockets[0].getsockname()[1]
+
+        client = OKXWSClient(
+            OKXWSOptions(ws_url=f"ws://127.0.0.1:{port}", pairs=["BTCUSDT", "ETH-USDT"])
+        )
+
+        got = []
+        try:
+            async def consume():
+                async for ev in client.messages():
+                    got.append(ev)
+                    if len(got) == 3:
+                        client.stop()
+                        break
+
+            await asyncio.wait_for(consume(), timeout=10)
+        finally:
+            await client._close_ws()
+            server.close()
+            await server.wait_closed()
+
+        return received, got
+
+    received, got = asyncio.run(main())
+
+    assert len(received) == 1
+    sub = received[0]
+    assert sub["op"] == "subscribe"
+    assert [a["instId"] for a in sub["args"]] == ["BTC-USDT", "ETH-USDT"]
+    assert all(a["channel"] == "books5" for a in sub["args"])
+
+    assert [ev["_pair"] for ev in got] == ["BTC-USDT", "BTC-USDT", "ETH-USDT"]
+    assert all(ev["_venue"] == "okx" for ev in got)
+
+
+def test_idle_heartbeat_keeps_connection_alive():
+    async def main():
+        pings = []
+
+        async def handler(ws):
+            await ws.recv()  # subscribe
+            async for msg in ws:
+                if msg == "ping":
+                    pings.append(msg)
+                    await ws.send("pong")
+
+        server = await websockets.serve(handler, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        client = OKXWSClient(OKXWSOptions(ws_url=f"ws://127.0.0.1:{port}", pairs=["BTCUSDT"], heartbeat_sec=0.1))
+
+        async def consume():
+            async for _ in client.messages():
+                pass
+
+        task = asyncio.create_task(consume())
+        try:
+            await asyncio.sleep(0.2)
+            seen0 = client.last_recv_ns
+            await asyncio.sleep(0.4)
+            connected = client.connected
+            seen1 = client.last_recv_ns
+        finally:
+            client.stop()
+            await client._close_ws()
+            await asyncio.wait_for(task, timeout=5)
+            server.close()
+            await server.wait_closed()
+        return pings, connected, seen0, seen1
+
+    pings, connected, seen0, seen1 = asyncio.run(main())
+
+    assert connected
+    assert len(pings) >= 2
+    assert seen1 > seen0
+
+
+def test_reconnect_resets_sequence_guard():
+    frame = json.loads(FRAMES.read_text(encoding="utf-8").splitlines()[1])
+
+    def with_seq(seq: int) -> str:
+        frame["data"][0]["seqId"] = seq
+        return json.dumps(frame)
+
+    async def main():
+        sessions = []
+
+        async def handler(ws):
+            await ws.recv()  # subscribe
+            sessions.append(1)
+            # друга сесія: біржа почала нумерацію заново
+            await ws.send(with_seq(41226000117 if len(sessions) == 1 else 5))
+            if len(sessions) == 1:
+                await ws.close()
+            else:
+                await ws.wait_closed()
+
+        server = await websockets.serve(handler, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        client = OKXWSClient(
+            OKXWSOptions(ws_url=f"ws://127.0.0.1:{port}", pairs=["BTCUSDT"], reconnect_min_delay=0.01)
+        )
+
+        accepted = []
+        try:
+            async def consume():
+                async for ev in client.messages():
+                    ob = client.adapter.parse_depth(ev)
+                    accepted.append(ob.last_update_id if client.adapter.check_sequence(ob) else None)
+                    if len(accepted) == 2:
+                        client.stop()
+                        break
+
+            await asyncio.wait_for(consume(), timeout=10)
+        finally:
+            await client._close_ws()
+            server.close()
+            await server.wait_closed()
+        return accepted
+
+    assert asyncio.run(main()) == [41226000117, 5]
@@ -0,0 +1,193 @@
+"""
+Replay benchmark для correlation stage: скільки викликів sink-ів під час market-wide storm-ів
+без кореляції і з нею.
+
+Фрейми (запис create_recorder або синтетичні storm-и) проганяються через parse -> metric ->
+TriggerEngine -> [AlertCorrelator] -> sink, час - з "_recv_ms" фрейму (flush по симульованому часу).
+Sink форматує повідомлення як TelegramSink (build_trigger_message) і рахує виклики.
+
+    python -m tools.bench_alert_storm --synthetic-pairs 60 --seconds 300
+    python -m tools.bench_alert_storm --frames data/recorded/frames.jsonl
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import time
+from dataclasses import replace
+from typing import Any, Dict, Iterable, List, Optional
+
+from app.core.clock import NS_PER_MS
+from app.core.config import AppCfg, CorrelationCfg, load_config
+from app.core.correlation import AlertCorrelator
+from app.core.gateway import pair_from_stream
+from app.core.metrics import calc_imbalance_ratio
+from app.core.models import TriggerEvent
+from app.core.replay import RECV_TS_KEY, load_frames
+from app.core.triggers import TriggerEngine
+from app.exchanges.base import DEFAULT_VENUE
+from app.exchanges.registry import build_adapter
+from app.notify.telegram.messages import build_trigger_message
+
+
+def storm_frames(
+    pairs: int,
+    seconds: int,
+    *,
+    storm_every_sec: int = 60,
+    storm_len_sec: int = 5,
+    step_ms: int = 100,
+    top_n: int = 10,
+    start_ms: int = 1_700_000_000_000,
+    seed: int = 7,
+) -> List[str]:
+    """
+    Спокійний ринок (imbalance ~ 0 з шумом, зрідка поодинокий сплеск по одній парі) +
+    раз на storm_every_sec весь ринок одночасно йде в SELL або BUY на storm_len_sec.
+    """
+    rnd = random.Random(seed)
+    names = [f"P{i:03d}USDT" for i in range(pairs)]
+    out: List[str] = []
+
+    for tick in range(seconds * 1000 // step_ms):
+        t_ms = tick * step_ms
+        sec = t_ms // 1000
+        storm = sec % storm_every_sec < storm_len_sec and sec >= storm_every_sec
+        side = -1.0 if (sec // storm_every_sec) % 2 else 1.0
+
+        for i, p in enumerate(names):
+            skew = rnd.gauss(0.0, 0.08)
+            if storm:
+                skew += side * rnd.uniform(0.35, 0.7)
+            elif rnd.random() < 0.0005:
+                skew += rnd.choice((-0.5, 0.5))
+            skew = max(-0.95, min(0.95, skew))
+
+            bid_q = 10.0 * (1 + skew)
+            ask_q = 10.0 * (1 - skew)
+            mid = 100.0 + i
+            msg = {
+                "stream": f"{p.lower()}@depth{top_n}@100ms",
+                "data": {
+                    "lastUpdateId": tick + 1,
+                    "bids": [[f"{mid - 0.01 * (k + 1):.2f}", f"{bid_q / top_n:.4f}"] for k in range(top_n)],
+                    "asks": [[f"{mid + 0.01 * (k + 1):.2f}", f"{ask_q / top_n:.4f}"] for k in range(top_n)],
+                },
+                RECV_TS_KEY: start_ms + t_ms,
+            }
+            out.append(json.dumps(msg, separators=(",", ":")))
+
+    return out
+
+
+class CountingSink:
+    def __init__(self) -> None:
+        self.calls = 0
+        self.max_per_sec = 0
+        self._sec = -1
+        self._in_sec = 0
+
+    def on_trigger(self, ev: TriggerEvent, now_ns: int) -> None:
+        build_trigger_message(ev)
+        self.calls += 1
+
+        sec = now_ns // 1_000_000_000
+        if sec != self._sec:
+            self._sec, self._in_sec = sec, 0
+        self._in_sec += 1
+        self.max_per_sec = max(self.max_per_sec, self._in_sec)
+
+
+def replay(
+    frames: Iterable[str],
+    cfg: AppCfg,
+    correlation: Optional[CorrelationCfg],
+) -> Dict[str, Any]:
+    adapters: Dict[str, Any] = {}
+    engine = TriggerEngine(list(cfg.triggers))
+    sink = CountingSink()
+
+    corr = None
+    bucket_ns = 0
+    if correlation is not None:
+        corr = AlertCorrelator(
+            window_sec=correlation.window_sec,
+            bucket_sec=correlation.bucket_sec,
+            min_pairs=correlation.min_pairs,
+            top_pairs=correlation.top_pairs,
+        )
+        bucket_ns = corr.bucket_ns
+
+    raw_events = 0
+    now = next_flush = 0
+    cpu0 = time.process_time()
+
+    for line in frames:
+        msg = json.loads(line)
+        stream = msg.get("stream")
+        if isinstance(stream, str) and "@depth" not in stream:
+            continue
+
+        now = int(msg.get(RECV_TS_KEY) or 0) * NS_PER_MS
+        data = msg.get("data") if isinstance(msg.get("data"), dict) else msg
+        if isinstance(stream, str):
+            data["_pair"] = pair_from_stream(stream)
+        data["_recv_ns"] = now
+
+        if corr is not None and now >= next_flush:
+            for ev in corr.flush(now):
+                sink.on_trigger(ev, now)
+            next_flush = now - now % bucket_ns + bucket_ns
+
+        venue = msg.get("_venue") or DEFAULT_VENUE
+        adapter = adapters.get(venue)
+        if adapter is None:
+            adapter = adapters[venue] = build_adapter(venue, cfg)
+
+        ob = adapter.parse_depth(data)
+        if ob is None:
+            continue
+
+        for ev in engine.process(calc_imbalance_ratio(ob, volume_mode=cfg.metrics.volume_mode)):
+            raw_events += 1
+            for out in corr.process(ev, now) if corr is not None else (ev,):
+                sink.on_trigger(out, now)
+
+    if corr is not None:
+        # хвіст storm-у після останнього фрейму
+        for ev in corr.flush(now + corr.window_ns * 2):
+            sink.on_trigger(ev, now)
+
+    return {
+        "trigger_events": raw_events,
+        "sink_calls": sink.calls,
+        "max_sink_calls_per_sec": sink.max_per_sec,
+        "cpu_s": round(time.process_time() - cpu0, 3),
+        **(corr.stats() if corr is not None else {}),
+    }
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Alert storm replay: sink calls without/with correlation")
+    ap.add_argument("--config", default="config/config.yaml")
+    ap.add_argument("--frames", default="", help="JSONL з record / create_recorder")
+    ap.add_argument("--limit", type=int, default=0)
+    ap.add_argument("--synthetic-pairs", type=int, default=60)
+    ap.add_argument("--seconds", type=int, default=300)
+    args = ap.parse_args()
+
+    cfg = load_config(args.config)
+    if args.frames:
+        frames = load_frames(args.frames, args.limit)
+    else:
+        frames = storm_frames(args.synthetic_pairs, args.seconds, top_n=cfg.binance.top_n)
+
+    corr_cfg = replace(cfg.correlation, enabled=True)
+    print(f"frames={len(frames)} | correlation: {corr_cfg}")
+    for name, c in (("off", None), ("on", corr_cfg)):
+        print(f"{name:>4}: {replay(frames, cfg, c)}")
+
+
+if __name__ == "__main__":
+    main()
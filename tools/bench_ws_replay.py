@@ -0,0 +1,144 @@
+"""
+Replay benchmark для WS read path: default vs performance runtime.
+
+Окремий процес піднімає локальний WS сервер (permessage-deflate дозволений), який після SUBSCRIBE
+віддає записані фрейми якнайшвидше. Клієнт - звичайний VenueWSClient + BinanceAdapter,
+міряємо CPU клієнтського процесу (process_time) на фрейм.
+
+    python -m tools.bench_ws_replay --frames data/recorded/frames.jsonl
+    python -m tools.bench_ws_replay --synthetic 50000
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import multiprocessing as mp
+import time
+from typing import Any, Dict, List
+
+import websockets
+
+from app.core.config import RuntimeCfg
+from app.core.replay import load_frames, synthetic_depth_frames
+from app.core.runtime import ws_tuning
+from app.exchanges.binance.adapter import BinanceAdapter
+from app.exchanges.binance.ws import BinanceWSClient, BinanceWSOptions
+
+
+def _serve(frames: List[str], port: int, ready: Any) -> None:
+    async def handler(ws: Any) -> None:
+        await ws.recv()  # SUBSCRIBE
+        for f in frames:
+            await ws.send(f)
+        await ws.close()
+
+    async def main() -> None:
+        async with websockets.serve(handler, "127.0.0.1", port, compression="deflate", max_size=None):
+            ready.set()
+            await asyncio.Future()
+
+    asyncio.run(main())
+
+
+async def _consume(port: int, n: int, tuning: Dict[str, Any]) -> Dict[str, float]:
+    adapter = BinanceAdapter()
+    client = BinanceWSClient(
+        BinanceWSOptions(ws_url=f"ws://127.0.0.1:{port}", pairs=["BTCUSDT"], **tuning),
+        adapter=adapter,
+    )
+
+    got = 0
+    cpu0 = time.process_time()
+    wall0 = time.perf_counter()
+
+    async for ev in client.messages():
+        data = ev.get("data")
+        if isinstance(data, dict):
+            data["_pair"] = "BTCUSDT"
+            adapter.parse_depth(data)
+        got += 1
+        if got >= n:
+            client.stop()
+            break
+
+    cpu = time.process_time() - cpu0
+    wall = time.perf_counter() - wall0
+    await client._close_ws()
+
+    return {"frames": got, "cpu_us_per_frame": cpu / max(1, got) * 1e6, "wall_s": wall}
+
+
+def _run_mode(name: str, rt: RuntimeCfg, frames: List[str], port: int) -> Dict[str, float]:
+    ready = mp.Event()
+    server = mp.Process(target=_serve, args=(frames, port, ready), daemon=True)
+    server.start()
+    ready.wait(10)
+
+    try:
+        coro = _consume(port, len(frames), ws_tuning(rt))
+        if rt.mode == "performance" and rt.uvloop:
+            try:
+                import uvloop
+
+                res = uvloop.run(coro)
+            except ImportError:
+                res = asyncio.run(coro)
+        else:
+            res = asyncio.run(coro)
+    finally:
+        server.terminate()
+        server.join()
+
+    res["mode"] = name
+    return res
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--frames", default="", help="JSONL з create_recorder")
+    ap.add_argument("--synthetic", type=int, default=20000)
+    ap.add_argument("--port", type=int, default=18765)
+    ap.add_argument("--repeat", type=int, default=3, help="медіана по N прогонах")
+    args = ap.parse_args()
+
+    if args.frames:
+        frames = load_frames(args.frames)
+    else:
+        frames = synthetic_depth_frames(["BTCUSDT", "ETHUSDT", "SOLUSDT"], args.synthetic)
+
+    modes = [
+        ("default", RuntimeCfg(mode="default")),
+        ("performance", RuntimeCfg(mode="performance")),
+        (
+            "perf+deflate",
+            RuntimeCfg(
+                mode="performance",
+                ws_compression="deflate",
+                ws_server_no_context_takeover=True,
+                ws_server_max_window_bits=10,
+            ),
+        ),
+    ]
+
+    results = []
+    port = args.port
+    for name, rt in modes:
+        runs = []
+        for _ in range(max(1, args.repeat)):
+            runs.append(_run_mode(name, rt, frames, port))
+            port += 1
+        runs.sort(key=lambda r: r["cpu_us_per_frame"])
+        results.append(runs[len(runs) // 2])
+
+    base = results[0]["cpu_us_per_frame"]
+    for r in results:
+        print(
+            f"{r['mode']:<13} frames={int(r['frames'])} "
+            f"cpu/frame={r['cpu_us_per_frame']:.1f}us "
+            f"({r['cpu_us_per_frame'] / base * 100:.0f}% of default) "
+            f"wall={r['wall_s']:.2f}s"
+        )
+
+
+if __name__ == "__main__":
+    main()